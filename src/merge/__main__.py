@@ -1,8 +1,12 @@
-from .common import copy_chart_folder
-from .helm_hander import consolidated_helm_chart_data, dump_consolidated_data_to_helm_chart
 from .cli import parse_args
+import os
 import sys
 import logging
+from fnmatch import fnmatchcase
+from functools import lru_cache, partial
+
+# Everything below parse_args is imported inside the commands that need it, so
+# --help, --version and argument errors do not pay for ruamel.yaml.
 
 EXCLUDE_FILES = (
     "Chart.yaml",
@@ -28,12 +32,14 @@ HELM_READ_CONFIG_SOURCE = {
     "exclude_files": EXCLUDE_FILES,
     "include_files": INCLUDE_FILES,
     "include_dirs": INCLUDE_DIRS,
+    "helmignore": False,
 }
 HELM_READ_CONFIG_TARGET = {
     "exclude_dirs": EXCLUDE_DIRS_TARGET,
     "exclude_files": EXCLUDE_FILES,
     "include_files": INCLUDE_FILES,
     "include_dirs": INCLUDE_DIRS,
+    "helmignore": False,
 }
 
 VALUES_ORDER_DEFAULT = [
@@ -45,25 +51,310 @@ VALUES_ORDER_DEFAULT = [
     "./documentum-components.yaml",
 ]
 
+RESOURCE_FILE_PATTERN = "documentum-resources-values-*.yaml"
+PLATFORM_DIR = "platforms"
+
+
+def resource_file_name(name):
+    """``small`` -> ``documentum-resources-values-small.yaml``; file names are kept."""
+    name = os.path.normpath(name)
+    if name.endswith((".yaml", ".yml")):
+        return name
+    return RESOURCE_FILE_PATTERN.replace("*", name)
+
+
+def platform_file_name(name):
+    """``anthos`` -> ``platforms/anthos.yaml``; paths are kept."""
+    name = os.path.normpath(name)
+    if not name.endswith((".yaml", ".yml")):
+        name += ".yaml"
+    return name if "/" in name else f"{PLATFORM_DIR}/{name}"
+
+
+def _replace_profile_entries(values_order, is_profile_entry, chosen):
+    """Put ``chosen`` where the first matching entry was, dropping the other matches."""
+    order = []
+    placed = False
+    for entry in values_order:
+        if not is_profile_entry(os.path.normpath(entry)):
+            order.append(entry)
+        elif not placed:
+            order.extend(f"./{name}" for name in chosen)
+            placed = True
+    if not placed:
+        order.extend(f"./{name}" for name in chosen)
+    return order
+
+
+def select_profile(values_order, resource_files=None, platforms=None, helmignore=False):
+    """
+    Build ``(values_order, source_config, target_config)`` for the chosen profiles.
+
+    ``resource_files`` (``small``, ``medium``, ... or file names) replace the
+    resource profile in ``values_order`` and every other
+    ``documentum-resources-values-*.yaml`` is excluded on both sides;
+    ``platforms`` likewise replace the ``platforms/`` entry. ``helmignore``
+    applies each chart's ``.helmignore`` on both sides. Without any of them,
+    the defaults are returned unchanged.
+    """
+    values_order = list(values_order)
+    source_config = dict(HELM_READ_CONFIG_SOURCE)
+    target_config = dict(HELM_READ_CONFIG_TARGET)
+    if helmignore:
+        source_config["helmignore"] = target_config["helmignore"] = True
+    if resource_files:
+        chosen = [resource_file_name(name) for name in resource_files]
+        values_order = _replace_profile_entries(
+            values_order, lambda entry: fnmatchcase(entry, RESOURCE_FILE_PATTERN), chosen
+        )
+        exclude_files = [name for name in EXCLUDE_FILES if not fnmatchcase(name, RESOURCE_FILE_PATTERN)]
+        exclude_files += [RESOURCE_FILE_PATTERN] + [f"!{name}" for name in chosen]
+        source_config["exclude_files"] = target_config["exclude_files"] = tuple(exclude_files)
+    if platforms:
+        chosen = [platform_file_name(name) for name in platforms]
+        values_order = _replace_profile_entries(
+            values_order, lambda entry: entry.startswith(f"{PLATFORM_DIR}/"), chosen
+        )
+        exclude_files = [f"{PLATFORM_DIR}/*"] + [f"!{name}" for name in chosen]
+        source_config["exclude_files"] = tuple(source_config["exclude_files"]) + tuple(exclude_files)
+    return values_order, source_config, target_config
+
+
+def print_summary(summary):
+    touched = sum(1 for updates_made in summary.values() if updates_made)
+    print(f"Files written: {touched}, unchanged files skipped: {len(summary) - touched}")
+
+
+def print_compare(report_path, counts):
+    from .helm_hander.compare import ADDED, CHANGED, REMOVED
+
+    print(
+        f"Compare report: {report_path} "
+        f"({counts[ADDED]} added, {counts[REMOVED]} removed, {counts[CHANGED]} changed)"
+    )
+
+
+def merge_file(args):
+    """Merge one YAML file into another, without the Helm chart pipeline."""
+    from .common import unique_output_file
+    from .helm_hander.remap import KeyRemapper
+    from .helm_hander.compare import compare_report_path, compare_yaml_file
+    from .helm_hander.processor import load_yaml_with_wrapped_scalars, update_yaml_from_wrapped_data
+
+    source_data = load_yaml_with_wrapped_scalars(args.source_path)
+    if args.updated_key:
+        source_data = KeyRemapper(args.updated_key).remap(source_data)
+
+    if args.compare or args.compare_only:
+        report_path = compare_report_path(args.compare_folder or os.getcwd(), args.target_path)
+        print_compare(report_path, compare_yaml_file(source_data, args.target_path, report_path))
+        if args.compare_only:
+            return
+
+    output_path = unique_output_file(args.target_path) if args.output else args.target_path
+    updates_made = update_yaml_from_wrapped_data(source_data, args.target_path, output_path)
+    if updates_made or args.output:
+        print(f"Paths updated: {len(updates_made)}, written to {output_path}")
+    else:
+        print("No changes, target file left untouched")
+
+
+def read_targets_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def unique_paths(paths):
+    """``paths`` without repeats of the same normalized path, in their original order."""
+    seen = set()
+    unique = []
+    for path in paths:
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def merge_batch(args, values_order, source_config, target_config):
+    """Consolidate the source once and merge it into every target chart; returns the exit status."""
+    from .common import link_chart_folder
+    from .helm_hander import ParseCache, consolidated_helm_chart_data, dump_consolidated_data_to_helm_charts
+
+    target_paths = list(args.target_paths)
+    if args.targets_file:
+        target_paths.extend(read_targets_file(args.targets_file))
+    target_paths = unique_paths(target_paths)
+    if not target_paths:
+        print("No target charts given.")
+        return 2
+
+    copy_errors = {}
+    if args.output:
+        copied = []
+        for target_path in target_paths:
+            try:
+                copied.append(link_chart_folder(target_path))
+            except Exception as e:
+                copy_errors[target_path] = str(e)
+        target_paths = copied
+
+    cache = None if args.no_cache else ParseCache()
+    _, processed_data, path_index = consolidated_helm_chart_data(
+        chart_path=args.source_path,
+        values_order=values_order,
+        workers=args.jobs,
+        cache=cache,
+        values_only=args.values_only,
+        remove_disabled=not args.merge_disabled_components,
+        **source_config,
+    )
+    results = dump_consolidated_data_to_helm_charts(
+        processed_data, target_paths, workers=args.jobs, path_index=path_index, **target_config
+    )
+    results.update((target_path, ({}, {target_path: error})) for target_path, error in copy_errors.items())
+
+    failed = 0
+    for target_path, (summary, errors) in results.items():
+        touched = sum(1 for updates_made in summary.values() if updates_made)
+        status = "FAILED" if errors else "ok"
+        print(f"{target_path}: {status}, files written: {touched}, unchanged files skipped: {len(summary) - touched}")
+        for path, error in errors.items():
+            print(f"  error in {path}: {error}")
+        failed += bool(errors)
+    print(f"Targets merged: {len(results) - failed}, failed: {failed}")
+    return 1 if failed else 0
+
+
+def merge_folder(args, values_order, source_config, target_config):
+    """Merge, compare, watch or incrementally update one target chart."""
+    from .common import link_chart_folder
+    from .helm_hander import (
+        ChartWatcher,
+        ParseCache,
+        compare_helm_chart,
+        consolidated_helm_chart_data,
+        dump_consolidated_data_to_helm_chart,
+        incremental_merge,
+        plan_consolidated_data_for_helm_chart,
+    )
+    from .helm_hander.compare import PLAN_SUFFIX, compare_report_path, write_plan_report
+
+    target_path = args.target_path
+
+    cache = None if args.no_cache else ParseCache()
+    # Consolidated at most once, and only by the steps that need it
+    consolidate = lru_cache(maxsize=None)(
+        partial(
+            consolidated_helm_chart_data,
+            chart_path=args.source_path,
+            values_order=values_order,
+            workers=args.jobs,
+            cache=cache,
+            values_only=args.values_only,
+            key_mappings=args.updated_key,
+            remove_disabled=not args.merge_disabled_components,
+            **source_config,
+        )
+    )
+    if args.compare or args.compare_only:
+        report_path, counts = compare_helm_chart(
+            consolidate()[1], target_path, args.compare_folder or os.getcwd(), **target_config
+        )
+        print_compare(report_path, counts)
+        if args.compare_only:
+            return
+
+    if args.dry_run:
+        _, processed_data, path_index = consolidate()
+        records = plan_consolidated_data_for_helm_chart(
+            processed_data,
+            target_path,
+            workers=args.jobs,
+            path_index=path_index,
+            filename_mappings=args.updated_filename,
+            **target_config,
+        )
+        report_path = compare_report_path(args.compare_folder or os.getcwd(), target_path, PLAN_SUFFIX)
+        paths, files = write_plan_report(records, report_path)
+        print(f"Dry run: {paths} paths would change in {files} files, plan: {report_path}")
+        return
+
+    if args.output:
+        target_path = link_chart_folder(target_path)
+
+    if args.watch:
+        watcher = ChartWatcher(
+            args.source_path,
+            target_path,
+            values_order,
+            source_config=source_config,
+            target_config=target_config,
+            workers=args.jobs,
+            values_only=args.values_only,
+            key_mappings=args.updated_key,
+            remove_disabled=not args.merge_disabled_components,
+            filename_mappings=args.updated_filename,
+        )
+        print(f"Watching {args.source_path} for changes, press Ctrl+C to stop.")
+        try:
+            watcher.run(on_update=print_summary)
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+        return
+
+    if args.incremental:
+        summary = incremental_merge(
+            args.source_path,
+            target_path,
+            values_order=values_order,
+            source_config=source_config,
+            target_config=target_config,
+            workers=args.jobs,
+            cache=cache,
+            values_only=args.values_only,
+            key_mappings=args.updated_key,
+            remove_disabled=not args.merge_disabled_components,
+            filename_mappings=args.updated_filename,
+        )
+    else:
+        app_version, processed_data, path_index = consolidate()
+        summary = dump_consolidated_data_to_helm_chart(
+            processed_data,
+            chart_path=target_path,
+            workers=args.jobs,
+            path_index=path_index,
+            filename_mappings=args.updated_filename,
+            **target_config,
+        )
+    print_summary(summary)
+
 
 def main():
-    logging.basicConfig(filename="yaml_update.log", level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
     args = parse_args(sys.argv[1:])
+    logging.basicConfig(filename="yaml_update.log", level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
 
     print("Parsed arguments:")
     for arg, value in vars(args).items():
         print(f"  {arg}: {value}")
 
-    target_path = args.target_path
+    if args.command == "file":
+        merge_file(args)
+        return
+
     values_order = args.configuration if args.configuration != None else VALUES_ORDER_DEFAULT
+    values_order, source_config, target_config = select_profile(
+        values_order,
+        getattr(args, "resource_file", None),
+        getattr(args, "platform", None),
+        helmignore=args.helmignore,
+    )
     print(f"values: {values_order}")
-
-    if args.output:
-        target_path = copy_chart_folder(target_path)
-
-    app_version, processed_data = consolidated_helm_chart_data(chart_path=args.source_path, values_order=values_order, **HELM_READ_CONFIG_SOURCE)
-    dump_consolidated_data_to_helm_chart(processed_data, chart_path=target_path, **HELM_READ_CONFIG_TARGET)
+    if args.command == "batch":
+        return merge_batch(args, values_order, source_config, target_config)
+    return merge_folder(args, values_order, source_config, target_config)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
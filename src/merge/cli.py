@@ -29,6 +29,22 @@ def is_folder(path):
     return path
 
 
+def is_file(path):
+    if not os.path.isfile(path):
+        raise argparse.ArgumentTypeError(f"{path} is not a valid file.")
+    return path
+
+
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value} is not an integer.")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} must be at least 1.")
+    return number
+
+
 def key_mapping(value):
     pattern = r"^\s*[^:]+:\s*[^:\s]*\s*$"
     if not re.match(pattern, value):
@@ -74,7 +90,7 @@ def parse_args(args):
     folder_parser.add_argument("--compare", "-c", action="store_true", help="Enable compare before merging")
     folder_parser.add_argument("--debug", action="store_true", help="Enable debug mode")
     folder_parser.add_argument("--log-folder", metavar="", type=is_folder, help="Folder for log reports")
-    folder_parser.add_argument("--output", "-o", action="store_true", help="Save updated target separately")
+    folder_parser.add_argument("--output", "-o", action="store_true", help="Save updated target separately (unchanged files are hard-linked)")
 
     # Folder customization group
     folder_parser.add_argument("--updated-key", metavar="", nargs="+", type=key_mapping, help="Custom key mappings")
@@ -83,7 +99,29 @@ def parse_args(args):
     folder_parser.add_argument("--resource-file", metavar="", nargs="+", help="Target resource file(s)")
     folder_parser.add_argument("--platform", metavar="", nargs="+", help="Platform file(s)")
     folder_parser.add_argument("--otds-config", action="store_true", help="Merge OTDS bootstrap config")
-    folder_parser.add_argument("--merge-disabled-components", action="store_true", help="Merge disabled components")
+    folder_parser.add_argument("--helmignore", action="store_true", help="Skip the files each chart's .helmignore lists")
+    folder_parser.add_argument("--merge-disabled-components", action="store_true", help="Also merge components the values files disable (left out by default)")
+    folder_parser.add_argument("--jobs", "-j", metavar="", type=positive_int, default=1, help="Number of worker processes for parsing and writing YAML files")
+    folder_parser.add_argument("--no-cache", action="store_true", help="Do not use the on-disk parse cache")
+    folder_parser.add_argument("--dry-run", action="store_true", help="Write the planned updates to the compare folder without changing the target")
+    folder_parser.add_argument("--incremental", action="store_true", help="Only re-merge what changed since the last run (keeps a manifest in the cache directory)")
+    folder_parser.add_argument("--watch", action="store_true", help="Keep running and merge source changes as they are saved")
+    folder_parser.add_argument("--values-only", action="store_true", help="Load source files with the fast safe loader (no line, quote or anchor metadata; compare and dry-run reports show no source line numbers)")
+
+    # -------------------- Batch Subcommand --------------------
+    batch_parser = subparsers.add_parser("batch", help="Merge one Helm chart folder into many target charts")
+    batch_parser.add_argument("source_path", type=is_helm_folder, help="Source Helm chart folder")
+    batch_parser.add_argument("target_paths", nargs="*", metavar="target_path", help="Target Helm chart folders")
+    batch_parser.add_argument("--targets-file", metavar="", type=is_file, help="File listing target chart folders, one per line")
+    batch_parser.add_argument("--configuration", metavar="", nargs="+", help="Additional config files in order")
+    batch_parser.add_argument("--helmignore", action="store_true", help="Skip the files each chart's .helmignore lists")
+    batch_parser.add_argument("--merge-disabled-components", action="store_true", help="Also merge components the values files disable (left out by default)")
+    batch_parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    batch_parser.add_argument("--log-folder", metavar="", type=is_folder, help="Folder for log reports")
+    batch_parser.add_argument("--output", "-o", action="store_true", help="Save updated targets separately (unchanged files are hard-linked)")
+    batch_parser.add_argument("--jobs", "-j", metavar="", type=positive_int, default=1, help="Number of worker processes for parsing and writing YAML files")
+    batch_parser.add_argument("--no-cache", action="store_true", help="Do not use the on-disk parse cache")
+    batch_parser.add_argument("--values-only", action="store_true", help="Load source files with the fast safe loader (no line, quote or anchor metadata; compare and dry-run reports show no source line numbers)")
 
     # -------------------- Parse --------------------
     return parser.parse_args(args)
@@ -1 +1 @@
-from .utils import copy_chart_folder
\ No newline at end of file
+from .utils import copy_chart_folder, link_chart_folder, unique_output_file
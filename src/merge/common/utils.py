@@ -1,19 +1,142 @@
 import os
 import shutil
 import logging
+from fnmatch import fnmatchcase
+
+LIST_REPLACE = "replace"
+LIST_APPEND = "append"
+LIST_MERGE_BY_KEY = "merge-by-key"
 
 def deep_merge(dest, src):
-    for k, v in src.items():
-        if k not in dest:
-            dest[k] = v
-        else:
-            if isinstance(dest[k], dict) and isinstance(v, dict):
-                deep_merge(dest[k], v)
+    """Merge ``src`` into ``dest`` in place and return ``dest``; lists are replaced."""
+    stack = [(dest, src)]
+    while stack:
+        dest_node, src_node = stack.pop()
+        for k, v in src_node.items():
+            current = dest_node.get(k)
+            if isinstance(current, dict) and isinstance(v, dict):
+                stack.append((current, v))
             else:
-                dest[k] = v
+                dest_node[k] = v
     return dest
 
-def copy_chart_folder(source_path, destination_path=None):
+def _copy_container(node):
+    """Shallow copy that keeps the container type (and ruamel metadata)."""
+    if isinstance(node, dict):
+        return node.copy()
+    copied = type(node)(node)
+    if hasattr(node, "copy_attributes"):
+        node.copy_attributes(copied)
+    return copied
+
+def _list_policy(list_policies, key_path, default):
+    if not list_policies:
+        return default
+    path = format_key_path(key_path)
+    policy = list_policies.get(path)
+    if policy is None:
+        for pattern, pattern_policy in list_policies.items():
+            if fnmatchcase(path, pattern):
+                return pattern_policy
+        return default
+    return policy
+
+def _item_mapping(item):
+    # Sequence items may be wrapped (WrappedNode.value) or plain mappings.
+    value = getattr(item, "value", item)
+    return value if isinstance(value, dict) else None
+
+def merge_trees(base, overlay, list_policies=None, default_list_policy=LIST_REPLACE):
+    """
+    Return ``base`` overlaid with ``overlay`` without mutating either input.
+
+    The merge walks ``overlay`` with an explicit stack, so depth is not bound by
+    the recursion limit. Containers are copied only along paths that ``overlay``
+    touches; every other subtree is shared with the inputs.
+
+    ``list_policies`` maps a path (``a.b[2].c`` form, fnmatch patterns allowed)
+    to how two lists at that path combine:
+
+    * ``"replace"`` - the overlay list wins (the default),
+    * ``"append"`` - overlay items are appended to the base items,
+    * ``"merge-by-key:<name>"`` - items whose mappings share ``<name>`` are
+      merged (plain mappings) or replaced (wrapped items), the rest appended;
+      overlay items repeating a ``<name>`` are merged in order.
+    """
+    if not (isinstance(base, dict) and isinstance(overlay, dict)):
+        return overlay
+
+    result = _copy_container(base)
+    stack = [((), result, overlay)]
+    while stack:
+        key_path, merged, src = stack.pop()
+        for k, v in src.items():
+            child_path = key_path + (k,)
+            current = merged.get(k)
+            if isinstance(current, dict) and isinstance(v, dict):
+                child = _copy_container(current)
+                merged[k] = child
+                stack.append((child_path, child, v))
+            elif isinstance(current, list) and isinstance(v, list):
+                policy = _list_policy(list_policies, child_path, default_list_policy)
+                merged[k] = _merge_lists(current, v, policy, child_path, stack)
+            else:
+                merged[k] = v
+    return result
+
+def _merge_lists(base, overlay, policy, key_path, stack):
+    if policy == LIST_REPLACE:
+        return overlay
+    if policy == LIST_APPEND:
+        merged = _copy_container(base)
+        merged.extend(overlay)
+        return merged
+    if policy.startswith(LIST_MERGE_BY_KEY + ":"):
+        merge_key = policy.split(":", 1)[1]
+        merged = _copy_container(base)
+        positions = {}
+        for idx, item in enumerate(merged):
+            mapping = _item_mapping(item)
+            if mapping is not None and merge_key in mapping:
+                positions.setdefault(mapping[merge_key], idx)
+        # Overlay items merged into each position, in overlay order, so that
+        # duplicate keys within the overlay merge one after another.
+        pending = {}
+        for item in overlay:
+            mapping = _item_mapping(item)
+            has_key = mapping is not None and merge_key in mapping
+            idx = positions.get(mapping[merge_key]) if has_key else None
+            if idx is None:
+                merged.append(item)
+                if has_key:
+                    positions[mapping[merge_key]] = len(merged) - 1
+            elif isinstance(item, dict) and isinstance(merged[idx], dict):
+                if idx not in pending:
+                    merged[idx] = _copy_container(merged[idx])
+                    pending[idx] = []
+                pending[idx].append(item)
+            else:
+                merged[idx] = item
+                pending.pop(idx, None)
+        for idx, items in pending.items():
+            # Pushed in reverse: each item's whole subtree is merged before the next one.
+            stack.extend((key_path + (idx,), merged[idx], item) for item in reversed(items))
+        return merged
+    raise ValueError(f"Unknown list merge policy {policy!r} at {format_key_path(key_path)}")
+
+def format_key_path(keys):
+    """Format a tuple of mapping keys and sequence indices as ``a.b[2].c``."""
+    parts = []
+    for key in keys:
+        if type(key) is int:
+            parts.append(f"[{key}]")
+        elif parts:
+            parts.append(f".{key}")
+        else:
+            parts.append(str(key))
+    return "".join(parts)
+
+def _unique_folder_path(source_path, destination_path=None):
     if not os.path.isdir(source_path):
         logging.error(f"Source path does not exist or is not a directory: {source_path}")
         raise FileNotFoundError(f"Source path does not exist or is not a directory: {source_path}")
@@ -37,6 +160,11 @@ def copy_chart_folder(source_path, destination_path=None):
         new_folder_path = os.path.join(base_destination, f"{folder_name}_copy{counter}")
         logging.info(f"Trying new folder name: {new_folder_path}")
         counter += 1
+    return new_folder_path
+
+
+def copy_chart_folder(source_path, destination_path=None):
+    new_folder_path = _unique_folder_path(source_path, destination_path)
 
     # Copy the folder
     try:
@@ -48,3 +176,52 @@ def copy_chart_folder(source_path, destination_path=None):
 
     return new_folder_path
 
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        shutil.copy2(src, dst)
+        return False
+
+
+def link_chart_folder(source_path, destination_path=None):
+    """
+    Like :func:`copy_chart_folder`, but hard-link files instead of copying them.
+
+    Files fall back to a copy where a hard link is not possible (another file
+    system, no permission). Write-back replaces changed YAML files atomically,
+    which breaks their link, so the source chart is never modified; unchanged
+    files, templates and subchart archives stay shared with it.
+    """
+    new_folder_path = _unique_folder_path(source_path, destination_path)
+    linked = copied = 0
+    try:
+        for root, _, files in os.walk(source_path, followlinks=True):
+            rel_root = os.path.relpath(root, source_path)
+            out_root = os.path.normpath(os.path.join(new_folder_path, rel_root))
+            os.makedirs(out_root, exist_ok=True)
+            for name in files:
+                if _link_or_copy(os.path.join(root, name), os.path.join(out_root, name)):
+                    linked += 1
+                else:
+                    copied += 1
+    except Exception as e:
+        logging.error(f"Failed to link folder: {e}")
+        raise
+
+    logging.info(f"Linked '{source_path}' to '{new_folder_path}': {linked} files linked, {copied} copied")
+    return new_folder_path
+
+
+def unique_output_file(file_path):
+    """A free ``<name>_copy<N><ext>`` path next to ``file_path`` for a separate output."""
+    root, ext = os.path.splitext(file_path)
+    counter = 1
+    output_path = f"{root}_copy{counter}{ext}"
+    while os.path.exists(output_path):
+        counter += 1
+        output_path = f"{root}_copy{counter}{ext}"
+    logging.info(f"Writing output to {output_path}")
+    return output_path
@@ -1,2 +1,11 @@
-from .chart import consolidated_helm_chart_data, dump_consolidated_data_to_helm_chart
+from .chart import (
+    consolidated_helm_chart_data,
+    dump_consolidated_data_to_helm_chart,
+    dump_consolidated_data_to_helm_charts,
+    plan_consolidated_data_for_helm_chart,
+)
 from .validators import is_helm_chart
+from .cache import ParseCache
+from .incremental import incremental_merge
+from .watch import ChartWatcher
+from .compare import compare_helm_chart, compare_yaml_file
@@ -0,0 +1,114 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+from .processor import load_yaml_with_wrapped_scalars
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Bump whenever the pickled shape of wrapped trees changes.
+CACHE_FORMAT_VERSION = 3
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+ENTRY_SUFFIX = ".pickle"
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "merge")
+
+
+class ParseCache:
+    """
+    On-disk cache of wrapped YAML trees, keyed by path, size, mtime and content hash.
+
+    Entries are pickles in ``cache_dir``; the entry mtime doubles as last-use time
+    so the least recently used entries are evicted once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, loader=load_yaml_with_wrapped_scalars):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.loader = loader
+
+    def entry_path(self, file_path, loader=None):
+        loader = loader or self.loader
+        abs_path = os.path.abspath(file_path)
+        st = os.stat(abs_path)
+        with open(abs_path, "rb") as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+        loader_name = f"{loader.__module__}.{loader.__qualname__}"
+        key = f"{CACHE_FORMAT_VERSION}\0{loader_name}\0{abs_path}\0{st.st_size}\0{st.st_mtime_ns}\0{content_hash}"
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ENTRY_SUFFIX)
+
+    def load(self, file_path, loader=None):
+        """
+        Return the wrapped tree for ``file_path``, parsing it only on a cache miss.
+
+        ``loader`` overrides the cache's default loader; entries are kept per loader.
+        """
+        loader = loader or self.loader
+        entry = self.entry_path(file_path, loader)
+        try:
+            with open(entry, "rb") as f:
+                data = pickle.load(f)
+            os.utime(entry)
+            logger.debug(f"Parse cache hit: {file_path}")
+            return data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Discarding unreadable parse cache entry {entry}: {e}")
+            self._remove(entry)
+
+        data = loader(file_path)
+        try:
+            self._store(entry, data)
+        except Exception as e:
+            logger.warning(f"Could not write parse cache entry for {file_path}: {e}")
+        return data
+
+    def _store(self, entry, data):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".entry-", suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in ``max_bytes``."""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith(ENTRY_SUFFIX):
+                    continue
+                try:
+                    st = dir_entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, dir_entry.path))
+                total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            self._remove(path)
+            total -= size
+            logger.debug(f"Evicted parse cache entry {path}")
+            if total <= self.max_bytes:
+                break
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
@@ -1,11 +1,23 @@
-from .metadata import get_chart_components, load_chart_metadata, get_disabled_components
-from .iterators import iter_yaml_files
-from .processor import load_yaml_with_wrapped_scalars, load_yaml, update_yaml_from_wrapped_data
+from .metadata import get_chart_components, get_component_conditions, load_chart_metadata, resolve_enabled_flags
+from .iterators import ChartFileFilter, iter_yaml_files, read_helmignore
+from .processor import (
+    load_yaml_with_wrapped_scalars,
+    load_values_only_with_wrapped_scalars,
+    load_yaml,
+    build_path_index,
+    iter_wrapped_nodes,
+    load_key_ownership,
+    plan_yaml_file,
+    update_yaml_from_wrapped_data,
+)
 from .validators import is_helm_chart
-from ..common.utils import deep_merge
+from .remap import KeyRemapper
+from ..common.utils import merge_trees
 
 import os
 import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from ruamel.yaml import YAML
 
 yaml = YAML()
@@ -15,11 +27,275 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
 
+def _iter_file_results(func, yaml_files, executor=None):
+    """
+    Yield (yaml_file, result, error) for ``func(yaml_file)``, in input order.
+
+    Without an ``executor`` the files are handled serially; otherwise every file
+    is submitted to it and results are still yielded in the order of ``yaml_files``.
+    """
+    if executor is None:
+        for yaml_file in yaml_files:
+            try:
+                yield yaml_file, func(yaml_file), None
+            except Exception as e:
+                yield yaml_file, None, e
+        return
+
+    with executor:
+        futures = [(yaml_file, executor.submit(func, yaml_file)) for yaml_file in yaml_files]
+        for yaml_file, future in futures:
+            try:
+                yield yaml_file, future.result(), None
+            except Exception as e:
+                yield yaml_file, None, e
+
+
+# The path index and filename mappings shared with worker processes, set once
+# per worker by the pool initializer instead of being pickled again for every file.
+_worker_routing = None
+
+
+def _set_worker_routing(routing):
+    global _worker_routing
+    _worker_routing = routing
+
+
+def _load_route(routing, yaml_file):
+    """Index the keys ``yaml_file`` defines and return its slice of the path index."""
+    path_index, mapped_targets = routing
+    try:
+        owned = load_key_ownership(yaml_file)
+    except Exception as e:
+        logger.debug(f"Cannot index the keys of {yaml_file}: {e}")
+        owned = None
+    return route_file(path_index, owned, yaml_file, mapped_targets)
+
+
+def _update_routed(routing, yaml_file):
+    path_index = _load_route(routing, yaml_file)
+    if not path_index:
+        logger.debug(f"No routed values for {yaml_file}, skipping")
+        return []
+    return update_yaml_from_wrapped_data(None, yaml_file, yaml_file, path_index)
+
+
+def _update_with_worker_routing(yaml_file):
+    return _update_routed(_worker_routing, yaml_file)
+
+
+def _plan_routed(routing, yaml_file):
+    path_index = _load_route(routing, yaml_file)
+    if not path_index:
+        return []
+    return [update.to_record(yaml_file) for update in plan_yaml_file(yaml_file, path_index)]
+
+
+def _plan_with_worker_routing(yaml_file):
+    return _plan_routed(_worker_routing, yaml_file)
+
+
+def _routed_executor(func, worker_func, routing, workers=None, pool="process"):
+    """The per-file function over ``routing`` and the executor to run it in (None for serial)."""
+    if not workers or workers <= 1:
+        return partial(func, routing), None
+    if pool == "process":
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_set_worker_routing, initargs=(routing,))
+        return worker_func, executor
+    if pool == "thread":
+        return partial(func, routing), ThreadPoolExecutor(max_workers=workers)
+    raise ValueError(f"Unknown pool type: {pool!r}")
+
+
+def _matches_filename(yaml_file, chart_path, name):
+    name = _normalize_rel_path(name)
+    if os.sep in name:
+        return os.path.relpath(yaml_file, chart_path) == name
+    return os.path.basename(yaml_file) == name
+
+
+def map_target_files(yaml_files, filename_mappings=None, chart_path=""):
+    """
+    Resolve ``(source_file, target_file)`` name mappings against ``yaml_files``.
+
+    Returns ``{source_file: {target_file, ...}}`` keyed by the normalized
+    source name; only file names are compared, so no target file is read.
+    """
+    mapped_targets = {}
+    for source_name, target_name in filename_mappings or ():
+        targets = [f for f in yaml_files if _matches_filename(f, chart_path, target_name)]
+        if not targets:
+            logger.warning(f"No target file matches {target_name} (mapped from {source_name})")
+        mapped_targets.setdefault(_normalize_rel_path(source_name), set()).update(targets)
+    return mapped_targets
+
+
+def _mapped_targets_for(mapped_targets, source_file):
+    """The target files ``source_file`` is mapped to: by its chart-relative path, else by its name."""
+    mapped = mapped_targets.get(source_file)
+    if mapped is None:
+        mapped = mapped_targets.get(os.path.basename(source_file))
+    return mapped
+
+
+def route_file(path_index, owned, yaml_file, mapped_targets=None):
+    """
+    The slice of ``path_index`` that ``yaml_file`` can match.
+
+    ``owned`` is the file's :class:`KeyOwnership` (see :func:`load_key_ownership`),
+    read by the worker that updates the file; the file gets the source
+    paths it defines, found by walking its own paths, or the whole index when
+    its ownership is unknown (None). Leaves whose value comes from a source file
+    in ``mapped_targets`` (see :func:`map_target_files`) only go to the mapped
+    target files; a mapped name with a directory only matches that file, a bare
+    name any source file of that name.
+    """
+    if owned is None:
+        return path_index
+    route = {}
+    for key_path in owned.matching(path_index):
+        node = path_index[key_path]
+        mapped = _mapped_targets_for(mapped_targets, node.file_path) if mapped_targets else None
+        if mapped is None or yaml_file in mapped:
+            route[key_path] = node
+    return route
+
+
+def _normalize_rel_path(rel_path):
+    return os.path.normpath(rel_path)
+
+
+def _resolve_values_files(chart_path, values_order, chart_filter):
+    """Absolute paths of the existing files in ``values_order`` that ``chart_filter`` accepts, without duplicates."""
+    yaml_files = []
+    seen = set()
+    for rel_path in values_order:
+        rel_path = _normalize_rel_path(rel_path)
+        if rel_path in seen:
+            continue
+        seen.add(rel_path)
+        if not chart_filter.accepts(rel_path):
+            logger.debug(f"Skipping excluded values file: {rel_path}")
+            continue
+        yaml_file = os.path.join(chart_path, rel_path)
+        if not os.path.isfile(yaml_file):
+            logger.debug(f"Values file not found, skipping: {rel_path}")
+            continue
+        yaml_files.append(yaml_file)
+    return yaml_files
+
+
+def resolve_values_files(
+    chart_path, values_order, exclude_dirs=None, exclude_files=None, include_dirs=None, include_files=None, helmignore=False
+):
+    """Absolute paths of the ``values_order`` files that exist in the chart and pass its filters."""
+    chart_filter = ChartFileFilter(
+        exclude_dirs, exclude_files, include_files, include_dirs, read_helmignore(chart_path) if helmignore else None
+    )
+    return _resolve_values_files(chart_path, values_order, chart_filter)
+
+
+def _load_values_file(loader, chart_path, yaml_file):
+    """Load one values file and label its nodes with the chart-relative path."""
+    data = loader(yaml_file)
+    rel_path = os.path.relpath(yaml_file, chart_path)
+    if rel_path != os.path.basename(yaml_file):
+        # Loaders only know the file name; files of the same name in other
+        # directories must stay apart for --updated-filename routing.
+        for node in iter_wrapped_nodes(data):
+            node.file_path = rel_path
+    return data
+
+
+def load_values_files(chart_path, yaml_files, workers=None, cache=None, values_only=False):
+    """
+    Parse and wrap ``yaml_files`` and return ``{rel_path: data}`` in input order.
+
+    The nodes' ``file_path`` is the chart-relative path of their file. Files
+    that fail to load are logged and left out.
+    """
+    processed_files = {}
+    executor = ProcessPoolExecutor(max_workers=workers) if workers and workers > 1 and len(yaml_files) > 1 else None
+    loader = load_values_only_with_wrapped_scalars if values_only else load_yaml_with_wrapped_scalars
+    if cache is not None:
+        loader = partial(cache.load, loader=loader)
+    loader = partial(_load_values_file, loader, chart_path)
+    for yaml_file, data, error in _iter_file_results(loader, yaml_files, executor):
+        if error is not None:
+            logger.error(f"Error processing {yaml_file}: {error}", exc_info=error)
+            continue
+        rel_path = os.path.relpath(yaml_file, chart_path)
+        processed_files[rel_path] = data
+        logger.debug(f"Processed file: {rel_path}")
+    return processed_files
+
+
+def layer_values(processed_files, values_order, list_policies=None):
+    """Merge the files of ``values_order`` on top of each other, later files winning."""
+    processed_data = {}
+    for rel_path in values_order:
+        data = processed_files.get(_normalize_rel_path(rel_path))
+        if not isinstance(data, dict):
+            continue
+        logger.debug(f"Layering values file: {rel_path}")
+        processed_data = merge_trees(processed_data, data, list_policies)
+    return processed_data
+
+
+def disabled_components(chart_meta, chart_path, processed_files, values_order):
+    """Components switched off by the values files, resolved before the files are layered."""
+    components = get_chart_components(chart_meta, chart_path)
+    layers = [processed_files.get(_normalize_rel_path(rel_path)) for rel_path in values_order]
+    flags = resolve_enabled_flags(get_component_conditions(chart_meta, components), [layer for layer in layers if layer])
+    return {component for component, enabled in flags.items() if not enabled}
+
+
+def prune_components(processed_files, components):
+    """Drop the top-level subtrees of ``components`` from every values file before layering."""
+    if not components:
+        return processed_files
+    logger.info(f"Skipping disabled components: {sorted(components)}")
+    return {
+        rel_path: {key: value for key, value in data.items() if key not in components} if isinstance(data, dict) else data
+        for rel_path, data in processed_files.items()
+    }
+
+
 def consolidated_helm_chart_data(
-    chart_path: str, remove_disabled=False, values_order=None, exclude_dirs=None, exclude_files=None, include_dirs=None, include_files=None
+    chart_path: str,
+    remove_disabled=False,
+    values_order=None,
+    exclude_dirs=None,
+    exclude_files=None,
+    include_dirs=None,
+    include_files=None,
+    helmignore=False,
+    workers=None,
+    cache=None,
+    values_only=False,
+    list_policies=None,
+    key_mappings=None,
 ):
     """
     Orchestrate Helm chart validation, metadata loading, YAML processing.
+
+    Only the files named in ``values_order`` are parsed and layered, later
+    files overriding earlier ones (see ``merge_trees`` for ``list_policies``).
+    The include/exclude patterns and ``helmignore`` work as in ``iter_yaml_files``.
+    Without a ``values_order`` every YAML file of the chart is layered in
+    discovery order.
+
+    Returns ``(app_version, processed_data, path_index)`` where ``path_index``
+    is the flat ``{key_path: WrappedNode}`` view of ``processed_data``.
+
+    ``workers`` > 1 parses the values files in a process pool.
+    ``cache`` is an optional :class:`ParseCache` consulted before parsing a file.
+    ``values_only`` loads files with the fast safe loader, without line, quote
+    and anchor metadata.
+    ``key_mappings`` are ``(source, target)`` key paths moved by :class:`KeyRemapper`
+    after layering.
+    ``remove_disabled`` resolves the components' enabled flags from the values
+    files first and leaves disabled components out of the layering.
     """
     # Validate
     if not is_helm_chart(chart_path):
@@ -31,40 +307,200 @@ def consolidated_helm_chart_data(
     meta = load_chart_metadata(chart_path)
     app_version = meta.get("appVersion")
 
-    # Extract components
-    components_list = get_chart_components(meta, chart_path)
+    # Parse only the files that take part in layering
+    if values_order is None:
+        yaml_files = list(
+            iter_yaml_files(
+                chart_path,
+                exclude_dirs=exclude_dirs,
+                exclude_files=exclude_files,
+                include_files=include_files,
+                include_dirs=include_dirs,
+                helmignore=helmignore,
+            )
+        )
+        values_order = [os.path.relpath(yaml_file, chart_path) for yaml_file in yaml_files]
+    else:
+        yaml_files = resolve_values_files(
+            chart_path, values_order, exclude_dirs, exclude_files, include_dirs, include_files, helmignore
+        )
 
-    # Process YAML files
-    processed_files = {}
-    for yaml_file in iter_yaml_files(chart_path, exclude_dirs, exclude_files, include_dirs, include_files):
-        try:
-            data = load_yaml_with_wrapped_scalars(yaml_file)
-            rel_path = os.path.relpath(yaml_file, chart_path)
-            processed_files[rel_path] = data
-            logger.debug(f"Processed file: {rel_path}")
-        except Exception as e:
-            logger.error(f"Error processing {yaml_file}: {e}", exc_info=True)
+    processed_files = load_values_files(chart_path, yaml_files, workers=workers, cache=cache, values_only=values_only)
+    if remove_disabled:
+        # Disabled components never reach the consolidated data, so their target
+        # files and subtrees are not routed, parsed or written either.
+        processed_files = prune_components(
+            processed_files, disabled_components(meta, chart_path, processed_files, values_order)
+        )
+    processed_data = layer_values(processed_files, values_order, list_policies)
 
-    processed_data = {}
+    if key_mappings:
+        processed_data = KeyRemapper(key_mappings).remap(processed_data)
 
-    print(processed_files.keys())
+    return app_version, processed_data, build_path_index(processed_data)
 
-    for rel_path in values_order:
-        if rel_path in processed_files:
-            print(rel_path)
-        processed_data = (processed_data, processed_files.get(rel_path, {}))
 
-    if remove_disabled:
-        disabled_components = get_disabled_components(components_list, processed_data)
-        processed_data = {key: val for key, val in processed_data.items() if key not in disabled_components}
+def dump_consolidated_data_to_helm_chart(
+    wrapped_data,
+    chart_path,
+    exclude_dirs=None,
+    exclude_files=None,
+    include_dirs=None,
+    include_files=None,
+    helmignore=False,
+    workers=None,
+    pool="process",
+    path_index=None,
+    yaml_files=None,
+    filename_mappings=None,
+):
+    """
+    Apply the consolidated data to every YAML file of the chart in place.
+
+    ``path_index`` is the flat index returned by ``consolidated_helm_chart_data``;
+    it is built here when not given, once for all target files. Each file only
+    receives the paths it defines, routed by :func:`route_file` (with
+    ``filename_mappings``), and files that receive nothing are not parsed.
+    ``yaml_files`` restricts the update to these files instead of walking the chart.
+    ``workers`` > 1 fans the files out over a ``pool`` ("process" or "thread").
+    Returns a mapping of each successfully processed file to its ``updates_made``
+    list; files with an empty list were left untouched on disk.
+    """
+    if yaml_files is None:
+        yaml_files = list(
+            iter_yaml_files(
+                chart_path,
+                exclude_dirs=exclude_dirs,
+                exclude_files=exclude_files,
+                include_files=include_files,
+                include_dirs=include_dirs,
+                helmignore=helmignore,
+            )
+        )
+
+    if path_index is None:
+        path_index = build_path_index(wrapped_data)
+    # Each file's keys are indexed and routed by the worker that updates it.
+    routing = (path_index, map_target_files(yaml_files, filename_mappings, chart_path))
+    func, executor = _routed_executor(_update_routed, _update_with_worker_routing, routing, workers, pool)
+    summary = {}
+    for yaml_file, updates_made, error in _iter_file_results(func, yaml_files, executor):
+        if error is not None:
+            logger.error(f"Error processing {yaml_file}: {error}", exc_info=error)
+            continue
+        summary[yaml_file] = updates_made
+        logger.debug(f"dumped to file: {yaml_file}")
+
+    touched = sum(1 for updates_made in summary.values() if updates_made)
+    logger.info(
+        f"Write-back complete. {sum(len(u) for u in summary.values())} paths updated, "
+        f"{touched} files written, {len(summary) - touched} unchanged files skipped."
+    )
+    return summary
+
+
+def dump_consolidated_data_to_helm_charts(
+    wrapped_data,
+    chart_paths,
+    exclude_dirs=None,
+    exclude_files=None,
+    include_dirs=None,
+    include_files=None,
+    helmignore=False,
+    workers=None,
+    pool="process",
+    path_index=None,
+    filename_mappings=None,
+):
+    """
+    Apply the consolidated data to several target charts in one worker pool.
+
+    The files of all charts share the pool, so the consolidated data is sent to
+    each worker once. Returns ``{chart_path: (summary, errors)}`` where
+    ``summary`` is as for :func:`dump_consolidated_data_to_helm_chart` and
+    ``errors`` maps the chart or file that failed to the error message.
+    """
+    if path_index is None:
+        path_index = build_path_index(wrapped_data)
+
+    results = {}
+    jobs = []
+    for chart_path in chart_paths:
+        summary, errors = results.setdefault(chart_path, ({}, {}))
+        if not is_helm_chart(chart_path):
+            errors[chart_path] = "not a valid Helm chart (missing Chart.yaml)"
+            continue
+        for yaml_file in iter_yaml_files(
+            chart_path,
+            exclude_dirs=exclude_dirs,
+            exclude_files=exclude_files,
+            include_files=include_files,
+            include_dirs=include_dirs,
+            helmignore=helmignore,
+        ):
+            jobs.append((chart_path, yaml_file))
+
+    mapped_targets = {}
+    for chart_path in chart_paths:
+        chart_files = [yaml_file for job_chart, yaml_file in jobs if job_chart == chart_path]
+        for source_name, targets in map_target_files(chart_files, filename_mappings, chart_path).items():
+            mapped_targets.setdefault(source_name, set()).update(targets)
+
+    func, executor = _routed_executor(
+        _update_routed, _update_with_worker_routing, (path_index, mapped_targets), workers if len(jobs) > 1 else None, pool
+    )
+    file_results = _iter_file_results(func, [yaml_file for _, yaml_file in jobs], executor)
+    for (chart_path, _), (yaml_file, updates_made, error) in zip(jobs, file_results):
+        summary, errors = results[chart_path]
+        if error is not None:
+            logger.error(f"Error processing {yaml_file}: {error}", exc_info=error)
+            errors[yaml_file] = str(error)
+        else:
+            summary[yaml_file] = updates_made
 
-    return app_version, processed_data
+    for chart_path, (summary, errors) in results.items():
+        touched = sum(1 for updates_made in summary.values() if updates_made)
+        logger.info(f"Batch write-back to {chart_path}: {touched} files written, {len(errors)} errors.")
+    return results
 
-def dump_consolidated_data_to_helm_chart(wrapped_data, chart_path, exclude_dirs=None, exclude_files=None, include_dirs=None, include_files=None):
-    for yaml_file in iter_yaml_files(chart_path, exclude_dirs, exclude_files, include_dirs, include_files):
-        try:
-            update_yaml_from_wrapped_data(wrapped_data, yaml_file, yaml_file)
-            logger.debug(f"dumped to file: {yaml_file}")
-        except Exception as e:
-            logger.error(f"Error processing {yaml_file}: {e}", exc_info=True)
 
+def plan_consolidated_data_for_helm_chart(
+    wrapped_data,
+    chart_path,
+    exclude_dirs=None,
+    exclude_files=None,
+    include_dirs=None,
+    include_files=None,
+    helmignore=False,
+    workers=None,
+    path_index=None,
+    filename_mappings=None,
+):
+    """
+    Yield the updates ``dump_consolidated_data_to_helm_chart`` would make, without writing.
+
+    Each update is a record from :meth:`PlannedUpdate.to_record` (file, path,
+    old and new value, source location and anchor effects), in file order.
+    """
+    yaml_files = list(
+        iter_yaml_files(
+            chart_path,
+            exclude_dirs=exclude_dirs,
+            exclude_files=exclude_files,
+            include_files=include_files,
+            include_dirs=include_dirs,
+            helmignore=helmignore,
+        )
+    )
+    if path_index is None:
+        path_index = build_path_index(wrapped_data)
+    routing = (path_index, map_target_files(yaml_files, filename_mappings, chart_path))
+    func, executor = _routed_executor(
+        _plan_routed, _plan_with_worker_routing, routing, workers if len(yaml_files) > 1 else None
+    )
+
+    for yaml_file, records, error in _iter_file_results(func, yaml_files, executor):
+        if error is not None:
+            logger.error(f"Error processing {yaml_file}: {error}", exc_info=error)
+            continue
+        yield from records
@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+from collections import Counter
+
+from .iterators import iter_yaml_files
+from .processor import WrappedNode, iter_wrapped_nodes, load_yaml, plain_value
+from ..common.utils import format_key_path
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+REPORT_SUFFIX = ".compare.jsonl"
+PLAN_SUFFIX = ".plan.jsonl"
+
+
+def _same(source, target):
+    source, target = plain_value(source), plain_value(target)
+    return source == target and isinstance(source, bool) == isinstance(target, bool)
+
+
+def _source_location(value):
+    """File and line of a source value, or of the first leaf below it."""
+    node = value if isinstance(value, WrappedNode) else next(iter_wrapped_nodes(value), None)
+    if node is None:
+        return None, None
+    return node.file_path or None, node.line_no
+
+
+def _target_line(container, key):
+    lc = getattr(container, "lc", None)
+    if lc is None:
+        return None
+    try:
+        line = lc.item(key)[0] if isinstance(container, list) else lc.key(key)[0]
+    except (KeyError, IndexError, TypeError):
+        return None
+    return line + 1
+
+
+def _record(change, keys, source_value, target_container, key, target_file):
+    source_file, source_line = _source_location(source_value) if change != REMOVED else (None, None)
+    target_line = _target_line(target_container, key) if change != ADDED else None
+    record = {"change": change, "path": format_key_path(keys)}
+    if change != REMOVED:
+        record.update(source=plain_value(source_value), source_file=source_file, source_line=source_line)
+    if change != ADDED:
+        record.update(target=plain_value(target_container[key]), target_file=target_file, target_line=target_line)
+    elif target_file is not None:
+        record["target_file"] = target_file
+    return record
+
+
+def iter_differences(source, target, target_file=None, shared_top_level=False):
+    """
+    Walk a wrapped ``source`` tree and a loaded ``target`` tree in lockstep.
+
+    Yields one record per added (source only), removed (target only) or
+    changed path, with the source file and line taken from the
+    :class:`WrappedNode` and the target line from the round-trip metadata.
+    A subtree present on one side only is reported once, at its root.
+    With ``shared_top_level`` top-level keys missing from the target are not
+    reported, for targets that hold only part of the values.
+    """
+    if not isinstance(source, dict) or not isinstance(target, dict):
+        return
+    # Entries are either a finished record or a pair of containers still to walk;
+    # children are pushed in reverse so records come out in document order.
+    stack = [(None, (), source, target, shared_top_level)]
+    while stack:
+        record, keys, src, tgt, shared_only = stack.pop()
+        if record is not None:
+            yield record
+            continue
+
+        children = []
+        if isinstance(src, dict):
+            child_keys = [key for key in src if key in tgt or not shared_only]
+            removed = [key for key in tgt if key not in src]
+        else:
+            child_keys = range(len(src))
+            removed = range(len(src), len(tgt))
+
+        for key in child_keys:
+            path = keys + (key,)
+            src_value = src[key]
+            if key not in tgt if isinstance(tgt, dict) else key >= len(tgt):
+                children.append((_record(ADDED, path, src_value, tgt, key, target_file), None, None, None, False))
+                continue
+            tgt_value = tgt[key]
+            if isinstance(src_value, dict) and isinstance(tgt_value, dict) or (
+                isinstance(src_value, list) and isinstance(tgt_value, list)
+            ):
+                children.append((None, path, src_value, tgt_value, False))
+            elif not _same(src_value, tgt_value):
+                children.append((_record(CHANGED, path, src_value, tgt, key, target_file), None, None, None, False))
+        for key in removed:
+            children.append((_record(REMOVED, keys + (key,), None, tgt, key, target_file), None, None, None, False))
+        stack.extend(reversed(children))
+
+
+def compare_report_path(compare_folder, target_path, suffix=REPORT_SUFFIX):
+    name = os.path.basename(os.path.normpath(target_path)) or "target"
+    return os.path.join(compare_folder, name + suffix)
+
+
+def write_plan_report(records, report_path):
+    """Stream dry-run records to ``report_path``; returns ``(paths, files)`` counts."""
+    paths = 0
+    files = set()
+    with open(report_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, default=str))
+            f.write("\n")
+            paths += 1
+            files.add(record["file"])
+    logger.info(f"Dry-run plan written to {report_path}: {paths} paths in {len(files)} files")
+    return paths, len(files)
+
+
+def _write_records(f, records, counts):
+    for record in records:
+        f.write(json.dumps(record, ensure_ascii=False, default=str))
+        f.write("\n")
+        counts[record["change"]] += 1
+
+
+def compare_yaml_file(wrapped_data, target_file, report_path):
+    """Compare ``wrapped_data`` with one target file; stream the records to ``report_path``."""
+    counts = Counter()
+    target = load_yaml(target_file)
+    with open(report_path, "w", encoding="utf-8") as f:
+        _write_records(f, iter_differences(wrapped_data, target, target_file), counts)
+    logger.info(f"Compare report written to {report_path}: {dict(counts)}")
+    return counts
+
+
+def compare_helm_chart(
+    wrapped_data,
+    chart_path,
+    compare_folder,
+    exclude_dirs=None,
+    exclude_files=None,
+    include_dirs=None,
+    include_files=None,
+    helmignore=False,
+):
+    """
+    Compare the consolidated data with every YAML file of the target chart.
+
+    Each target file is loaded, compared and released in turn, so memory does
+    not grow with the number of files. Records stream into one JSON Lines
+    report in ``compare_folder``; top-level source keys no target file holds
+    are reported as added at the end. Returns ``(report_path, counts)``.
+    """
+    report_path = compare_report_path(compare_folder, chart_path)
+    counts = Counter()
+    seen_top_level = set()
+    with open(report_path, "w", encoding="utf-8") as f:
+        for yaml_file in iter_yaml_files(
+            chart_path,
+            exclude_dirs=exclude_dirs,
+            exclude_files=exclude_files,
+            include_files=include_files,
+            include_dirs=include_dirs,
+            helmignore=helmignore,
+        ):
+            try:
+                target = load_yaml(yaml_file)
+            except Exception as e:
+                logger.error(f"Error processing {yaml_file}: {e}", exc_info=e)
+                continue
+            if not isinstance(target, dict):
+                continue
+            seen_top_level.update(target)
+            _write_records(f, iter_differences(wrapped_data, target, yaml_file, shared_top_level=True), counts)
+
+        unowned = {key: value for key, value in wrapped_data.items() if key not in seen_top_level}
+        _write_records(f, iter_differences(unowned, {}), counts)
+
+    logger.info(f"Compare report written to {report_path}: {dict(counts)}")
+    return report_path, counts
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from functools import partial
+
+from .cache import default_cache_dir
+from .chart import consolidated_helm_chart_data, dump_consolidated_data_to_helm_chart, resolve_values_files
+from .iterators import iter_yaml_files
+from .processor import top_level_keys
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Bump whenever the manifest layout or the value hashing changes.
+MANIFEST_VERSION = 1
+
+
+def file_sha256(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def value_hashes(path_index):
+    """Hash the consolidated leaves per top-level key: ``{top_key: sha256}``."""
+    hashes = {}
+    for key_path, node in path_index.items():
+        digest = hashes.setdefault(str(key_path[0]), hashlib.sha256())
+        digest.update(repr((key_path, node.value)).encode("utf-8"))
+    return {key: digest.hexdigest() for key, digest in hashes.items()}
+
+
+def default_manifest_path(target_path, cache_dir=None):
+    abs_target = os.path.abspath(target_path)
+    name = hashlib.sha256(abs_target.encode("utf-8")).hexdigest() + ".json"
+    return os.path.join(cache_dir or default_cache_dir(), "manifests", name)
+
+
+class MergeManifest:
+    """
+    Fingerprints of the last merge into one target chart.
+
+    ``sources`` and ``targets`` map chart-relative paths to content hashes
+    (targets also record their top-level keys), ``values`` holds the
+    :func:`value_hashes` of the consolidated data and ``options`` a hash of
+    the settings the merge ran with.
+    """
+
+    def __init__(self, path, options=None, sources=None, values=None, targets=None):
+        self.path = path
+        self.options = options
+        self.sources = sources or {}
+        self.values = values or {}
+        self.targets = targets or {}
+
+    @classmethod
+    def load(cls, path):
+        """Read the manifest at ``path``; a missing or unreadable one is empty."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable merge manifest {path}: {e}")
+            return cls(path)
+        if not isinstance(raw, dict) or raw.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, raw.get("options"), raw.get("sources"), raw.get("values"), raw.get("targets"))
+
+    def save(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        raw = {
+            "version": MANIFEST_VERSION,
+            "options": self.options,
+            "sources": self.sources,
+            "values": self.values,
+            "targets": self.targets,
+        }
+        fd, tmp_path = tempfile.mkstemp(prefix=".manifest-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(raw, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+def options_fingerprint(
+    source_path,
+    values_order,
+    values_only,
+    remove_disabled,
+    source_config,
+    target_config,
+    key_mappings=None,
+    filename_mappings=None,
+):
+    options = {
+        "version": MANIFEST_VERSION,
+        "source_path": os.path.abspath(source_path),
+        "values_order": list(values_order) if values_order is not None else None,
+        "values_only": values_only,
+        "remove_disabled": remove_disabled,
+        "key_mappings": [list(mapping) for mapping in key_mappings or ()],
+        "filename_mappings": [list(mapping) for mapping in filename_mappings or ()],
+        "source_config": {key: source_config[key] for key in sorted(source_config)},
+        "target_config": {key: target_config[key] for key in sorted(target_config)},
+    }
+    return hashlib.sha256(json.dumps(options, sort_keys=True, default=list).encode("utf-8")).hexdigest()
+
+
+def _source_files(source_path, values_order, source_config):
+    """Chart.yaml plus every values file that feeds the consolidated data."""
+    if values_order is None:
+        yaml_files = list(iter_yaml_files(source_path, **source_config))
+    else:
+        yaml_files = resolve_values_files(source_path, values_order, **source_config)
+    chart_file = os.path.join(source_path, "Chart.yaml")
+    return [chart_file] + [yaml_file for yaml_file in yaml_files if yaml_file != chart_file]
+
+
+def incremental_merge(
+    source_path,
+    target_path,
+    values_order=None,
+    source_config=None,
+    target_config=None,
+    workers=None,
+    cache=None,
+    values_only=False,
+    remove_disabled=False,
+    manifest_path=None,
+    key_mappings=None,
+    filename_mappings=None,
+):
+    """
+    Merge ``source_path`` into ``target_path``, redoing only what changed since the last run.
+
+    The source is consolidated again only when one of its files or the merge
+    options changed (unchanged files still come from ``cache``). A target file
+    is re-applied when it is new, was edited, or owns a top-level key whose
+    consolidated values changed. Returns the same summary as
+    :func:`dump_consolidated_data_to_helm_chart` for the files re-applied.
+    """
+    source_config = dict(source_config or {})
+    target_config = dict(target_config or {})
+    manifest = MergeManifest.load(manifest_path or default_manifest_path(target_path))
+    options = options_fingerprint(
+        source_path,
+        values_order,
+        values_only,
+        remove_disabled,
+        source_config,
+        target_config,
+        key_mappings,
+        filename_mappings,
+    )
+
+    sources = {
+        os.path.relpath(yaml_file, source_path): file_sha256(yaml_file)
+        for yaml_file in _source_files(source_path, values_order, source_config)
+    }
+    consolidate = partial(
+        consolidated_helm_chart_data,
+        source_path,
+        remove_disabled=remove_disabled,
+        values_order=values_order,
+        workers=workers,
+        cache=cache,
+        values_only=values_only,
+        key_mappings=key_mappings,
+        **source_config,
+    )
+    full_run = manifest.options != options
+    consolidated = None
+    if not full_run and manifest.sources == sources:
+        logger.info("Source chart unchanged since the last merge.")
+        values = manifest.values
+        changed_keys = set()
+    else:
+        consolidated = consolidate()
+        values = value_hashes(consolidated[2])
+        changed_keys = {key for key in values.keys() | manifest.values.keys() if values.get(key) != manifest.values.get(key)}
+        logger.info(f"Changed top-level keys since the last merge: {sorted(changed_keys)}")
+
+    targets = {}
+    pending = []
+    for yaml_file in iter_yaml_files(target_path, **target_config):
+        rel_path = os.path.relpath(yaml_file, target_path)
+        entry = manifest.targets.get(rel_path)
+        if (
+            full_run
+            or entry is None
+            or entry.get("sha") != file_sha256(yaml_file)
+            or changed_keys.intersection(entry.get("keys", ()))
+        ):
+            pending.append(yaml_file)
+        else:
+            targets[rel_path] = entry
+
+    skipped = len(targets)
+    summary = {}
+    if pending:
+        if consolidated is None:
+            consolidated = consolidate()
+        _, processed_data, path_index = consolidated
+        summary = dump_consolidated_data_to_helm_chart(
+            processed_data,
+            target_path,
+            workers=workers,
+            path_index=path_index,
+            yaml_files=pending,
+            filename_mappings=filename_mappings,
+        )
+
+    for yaml_file in summary:
+        try:
+            targets[os.path.relpath(yaml_file, target_path)] = {
+                "sha": file_sha256(yaml_file),
+                "keys": top_level_keys(yaml_file),
+            }
+        except Exception as e:
+            logger.warning(f"Not recording {yaml_file} in the merge manifest: {e}")
+
+    logger.info(f"Incremental merge re-applied {len(pending)} target files, skipped {skipped} unchanged ones.")
+    manifest.options = options
+    manifest.sources = sources
+    manifest.values = values
+    manifest.targets = targets
+    manifest.save()
+    return summary
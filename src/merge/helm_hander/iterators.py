@@ -1,26 +1,186 @@
 import os
+import re
 import logging
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+HELMIGNORE_FILE = ".helmignore"
+REGEX_PREFIX = "re:"
 
-def iter_yaml_files(base_path: str,
-                    exclude_dirs=None, exclude_files=None , include_files = None, include_dirs = None):
-
-    exclude_dirs = set(exclude_dirs or [])
-    exclude_files = set(exclude_files or [])
 
-    for root, dirs, files in os.walk(base_path):
-        # Filter out excluded directories in-place so os.walk skips them
-        dirs[:] = [d for d in dirs if d not in exclude_dirs]
+def _glob_to_regex(pattern):
+    """
+    Translate a glob to a regular expression the way ``.helmignore`` reads it.
 
-        for file in files:
-            if not file.endswith((".yaml", ".yml")):
+    Unlike ``fnmatch``, ``*`` and ``?`` do not match ``/``, so ``templates/*``
+    matches the files directly in ``templates`` only.
+    """
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            j = i
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                parts.append(re.escape(c))
                 continue
+            body = pattern[i:j].replace("\\", "\\\\")
+            if body[0] in "!^":
+                body = "^" + body[1:]
+            parts.append(f"[{body}]")
+            i = j + 1
+        else:
+            parts.append(re.escape(c))
+    return "".join(parts)
+
+
+class PathRules:
+    """
+    Ordered, precompiled path patterns matched against chart-relative paths.
+
+    A pattern is a glob matched against the base name, or against the whole
+    relative path when it contains a ``/``; ``re:<regex>`` is a regular
+    expression for the whole relative path. As in ``.helmignore``, ``*`` does
+    not match ``/``, a leading ``!`` negates a pattern, a trailing ``/``
+    restricts it to directories and the last matching pattern wins.
+    """
+
+    def __init__(self, patterns=(), dir_only=False):
+        self.rules = [self._compile(pattern, dir_only) for pattern in patterns if pattern and pattern.strip()]
 
-            if file in exclude_files:
-                logger.debug(f"Skipping excluded file: {file}")
+    @staticmethod
+    def _compile(pattern, dir_only):
+        pattern = pattern.strip()
+        negate = pattern.startswith("!")
+        if negate:
+            pattern = pattern[1:]
+        if pattern.startswith(REGEX_PREFIX):
+            return re.compile(pattern[len(REGEX_PREFIX):]), True, negate, dir_only
+
+        if pattern.endswith("/"):
+            pattern = pattern.rstrip("/")
+            dir_only = True
+        if pattern.startswith("./"):
+            pattern = pattern[2:]
+        on_path = "/" in pattern
+        return re.compile(_glob_to_regex(pattern.lstrip("/"))), on_path, negate, dir_only
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def match(self, rel_path, is_dir=False):
+        """True or False from the last matching rule, None when no rule matches."""
+        result = None
+        name = rel_path.rsplit("/", 1)[-1]
+        for regex, on_path, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
                 continue
+            if regex.fullmatch(rel_path if on_path else name):
+                result = not negate
+        return result
+
+
+def read_helmignore(base_path):
+    """Patterns from the chart's ``.helmignore`` (empty if there is none)."""
+    path = os.path.join(base_path, HELMIGNORE_FILE)
+    if not os.path.isfile(path):
+        return []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+class ChartFileFilter:
+    """Include/exclude rules for chart files, compiled once per walk."""
+
+    def __init__(self, exclude_dirs=None, exclude_files=None, include_files=None, include_dirs=None, ignore_patterns=None):
+        self.exclude_dirs = PathRules(exclude_dirs or (), dir_only=True)
+        self.exclude_files = PathRules(exclude_files or ())
+        self.include_files = PathRules(include_files or ())
+        self.include_dirs = PathRules(include_dirs or (), dir_only=True)
+        self.ignore = PathRules(ignore_patterns or ())
+
+    def skip_dir(self, rel_dir):
+        excluded = self.ignore.match(rel_dir, is_dir=True)
+        if self.exclude_dirs.match(rel_dir, is_dir=True):
+            excluded = True
+        return bool(excluded)
+
+    def accept_file(self, rel_path, in_included_dir=True):
+        if not rel_path.endswith((".yaml", ".yml")):
+            return False
+        if self.ignore.match(rel_path) or self.exclude_files.match(rel_path):
+            return False
+        if self.include_files and not self.include_files.match(rel_path):
+            return False
+        return in_included_dir or not self.include_dirs
+
+    def accepts(self, rel_path):
+        """Check a relative file path, including every directory above it."""
+        rel_path = rel_path.replace(os.sep, "/")
+        parts = rel_path.split("/")[:-1]
+        in_included_dir = False
+        for depth in range(1, len(parts) + 1):
+            rel_dir = "/".join(parts[:depth])
+            if self.skip_dir(rel_dir):
+                return False
+            in_included_dir = in_included_dir or bool(self.include_dirs.match(rel_dir, is_dir=True))
+        return self.accept_file(rel_path, in_included_dir)
+
+
+def iter_yaml_files(base_path: str,
+                    exclude_dirs=None, exclude_files=None , include_files = None, include_dirs = None, helmignore=False):
+    """
+    Yield YAML files under ``base_path`` in a stable, sorted order.
+
+    Excluded directories are pruned while walking with ``os.scandir``; see
+    :class:`PathRules` for the pattern syntax. ``include_files`` keeps only
+    matching files and ``include_dirs`` only files below a matching directory.
+    With ``helmignore`` the chart's ``.helmignore`` rules are applied as well.
+    """
+    chart_filter = ChartFileFilter(
+        exclude_dirs,
+        exclude_files,
+        include_files,
+        include_dirs,
+        read_helmignore(base_path) if helmignore else None,
+    )
+
+    stack = [("", base_path, False)]
+    while stack:
+        rel_dir, abs_dir, in_included_dir = stack.pop()
+        try:
+            with os.scandir(abs_dir) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            logger.warning(f"Cannot read directory {abs_dir}: {e}")
+            continue
+
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if chart_filter.skip_dir(rel_path):
+                    logger.debug(f"Skipping excluded directory: {rel_path}")
+                    continue
+                included = in_included_dir or bool(chart_filter.include_dirs.match(rel_path, is_dir=True))
+                subdirs.append((rel_path, entry.path, included))
+            elif entry.is_file():
+                if chart_filter.accept_file(rel_path, in_included_dir):
+                    yield entry.path
+                elif rel_path.endswith((".yaml", ".yml")):
+                    logger.debug(f"Skipping excluded file: {rel_path}")
 
-            yield os.path.join(root, file)
+        stack.extend(reversed(subdirs))
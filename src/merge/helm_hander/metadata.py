@@ -1,7 +1,6 @@
 import os
 from .validators import is_helm_chart
 from ruamel.yaml import YAML
-from ruamel.yaml import CommentedMap
 
 yaml = YAML()
 yaml.preserve_quotes = True
@@ -40,12 +39,51 @@ def get_chart_components(chart_meta: dict, chart_path: str):
     return sorted(set(components))
 
 
-def get_disabled_components(components: list, data: dict) -> list:
+def get_component_conditions(chart_meta: dict, components: list) -> dict:
     """
-    Return a list of top-level keys (components) that have `enabled: false`.
+    Map each component to the value paths that enable it.
+
+    A dependency's ``condition`` in Chart.yaml (comma-separated paths) is used
+    when present, ``<component>.enabled`` otherwise.
+    """
+    conditions = {component: [f"{component}.enabled"] for component in components}
+    for dep in chart_meta.get("dependencies") or ():
+        if isinstance(dep, dict) and dep.get("name") in conditions and dep.get("condition"):
+            conditions[dep["name"]] = [path.strip() for path in str(dep["condition"]).split(",") if path.strip()]
+    return conditions
+
+
+_MISSING = object()
+
+
+def _lookup(data, path):
+    node = data
+    for key in path.split("."):
+        if not isinstance(node, dict) or key not in node:
+            return _MISSING
+        node = node[key]
+    return getattr(node, "value", node)
+
+
+def resolve_enabled_flags(conditions: dict, layers: list) -> dict:
+    """
+    Resolve ``{component: enabled}`` from values files in layering order.
+
+    As in Helm, each condition path is resolved over all layers (the last
+    layer setting it wins) and the first path that is set decides; a
+    component without any setting is enabled.
     """
-    disabled = []
-    for component in components:
-        if (isinstance(data[component], dict) or isinstance(data[component], CommentedMap)) and not data[component].get("enabled", True):
-            disabled.append(component)
-    return disabled
+    flags = {}
+    for component, paths in conditions.items():
+        enabled = True
+        for path in paths:
+            value = _MISSING
+            for data in layers:
+                layer_value = _lookup(data, path)
+                if layer_value is not _MISSING:
+                    value = layer_value
+            if value is not _MISSING:
+                enabled = bool(value)
+                break
+        flags[component] = enabled
+    return flags
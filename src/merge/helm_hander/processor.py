@@ -1,8 +1,19 @@
 import logging
+import os
+import shutil
+import tempfile
 from pathlib import Path
 from ruamel.yaml import YAML
 from ruamel.yaml.comments import CommentedMap, CommentedSeq
-from ruamel.yaml.scalarstring import ScalarString
+from ruamel.yaml.composer import Composer
+from ruamel.yaml.constructor import RoundTripConstructor
+from ruamel.yaml.events import AliasEvent
+from ruamel.yaml.scalarbool import ScalarBoolean
+from ruamel.yaml.scalarfloat import ScalarFloat
+from ruamel.yaml.scalarint import ScalarInt
+from ruamel.yaml.scalarstring import PlainScalarString, ScalarString
+
+from ..common.utils import format_key_path
 
 def remove_aliases_yaml():
     yaml = YAML(typ='rt')
@@ -15,15 +26,69 @@ def make_yaml():
     yaml.preserve_quotes = True
     return yaml
 
+def make_values_only_yaml():
+    # libyaml-backed when ruamel.yaml.clib is installed, pure Python otherwise
+    return YAML(typ='safe', pure=False)
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# os.umask can only be read by setting it, so read it once at import, before
+# any worker thread writes files.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+class KeyPath:
+    """Position of a container in the tree: its parent KeyPath and the key or index under it."""
+
+    __slots__ = ("parent", "key")
+
+    def __init__(self, parent=None, key=None):
+        self.parent = parent
+        self.key = key
+
+    def keys(self):
+        keys = []
+        node = self
+        while node.parent is not None:
+            keys.append(node.key)
+            node = node.parent
+        keys.reverse()
+        return tuple(keys)
+
+    def __str__(self):
+        return format_key_path(self.keys())
+
+    def __repr__(self):
+        return f"KeyPath({self})"
+
+
 class WrappedNode:
+    """
+    A scalar (or sequence item) with its source metadata.
+
+    The dotted ``path`` is not stored; it is derived on demand from the parent
+    :class:`KeyPath` and this node's ``key``.
+    """
+
+    __slots__ = (
+        "value",
+        "file_path",
+        "line_no",
+        "quote_style",
+        "is_anchored",
+        "anchor_name",
+        "was_aliased",
+        "parent",
+        "key",
+    )
+
     def __init__(
         self,
         value,
-        path,
-        file_path,
+        parent=None,
+        key=None,
+        file_path="",
         line_no=None,
         quote_style=None,
         is_anchored=False,
@@ -31,7 +96,8 @@ class WrappedNode:
         was_aliased=False,
     ):
         self.value = value
-        self.path = path
+        self.parent = parent
+        self.key = key
         self.file_path = file_path
         self.line_no = line_no
         self.quote_style = quote_style
@@ -39,6 +105,17 @@ class WrappedNode:
         self.anchor_name = anchor_name
         self.was_aliased = was_aliased
 
+    @property
+    def key_path(self):
+        """Tuple of keys and indices from the document root to this node."""
+        if self.parent is None:
+            return () if self.key is None else (self.key,)
+        return self.parent.keys() + (self.key,)
+
+    @property
+    def path(self):
+        return format_key_path(self.key_path)
+
     def __repr__(self):
         return (
             f"WrappedNode({self.path} @ {self.file_path}:{self.line_no} = {self.value!r}, "
@@ -51,20 +128,29 @@ def get_line_no(node):
 def get_quote_style(node):
     return getattr(node, "style", None) if isinstance(node, ScalarString) else None
 
-def wrap_scalar_nodes(node, path="", file_path=""):
-    if isinstance(node, CommentedMap):
+def wrap_scalar_nodes(node, path=None, file_path="", key=None):
+    """
+    Replace scalars in ``node`` with WrappedNode objects.
+
+    ``path`` is the KeyPath of the container holding ``node`` and ``key`` its
+    key or index there; nested containers get a KeyPath of their own.
+    """
+    if path is None:
+        path = KeyPath()
+    if isinstance(node, dict):
+        node_path = KeyPath(path, key) if key is not None else path
         for k, v in node.items():
-            child_path = f"{path}.{k}" if path else k
-            node[k] = wrap_scalar_nodes(v, child_path, file_path)
+            node[k] = wrap_scalar_nodes(v, node_path, file_path, k)
         return node
-    elif isinstance(node, CommentedSeq):
-        new_seq = CommentedSeq()
+    elif isinstance(node, list):
+        node_path = KeyPath(path, key) if key is not None else path
+        new_seq = CommentedSeq() if isinstance(node, CommentedSeq) else []
         for idx, item in enumerate(node):
-            child_path = f"{path}[{idx}]"
             line_no = get_line_no(item)
             wrapped_item = WrappedNode(
                 value=item,
-                path=child_path,
+                parent=node_path,
+                key=idx,
                 file_path=file_path,
                 line_no=line_no,
                 quote_style=None,
@@ -75,140 +161,588 @@ def wrap_scalar_nodes(node, path="", file_path=""):
             new_seq.append(wrapped_item)
         return new_seq
     elif isinstance(node, (str, int, float, bool, type(None))):
-        quote_style = get_quote_style(node)
-        line_no = get_line_no(node)
-        is_anchored = hasattr(node, "anchor") and bool(getattr(node, "anchor", None).value)
-        anchor_name = getattr(getattr(node, "anchor", None), "value", None)
-        was_aliased = getattr(node, "anchor", None) is not None and getattr(node.anchor, "always_dump", False)
+        anchor = getattr(node, "anchor", None)
+        anchor_name = getattr(anchor, "value", None)
+        was_aliased = anchor is not None and getattr(anchor, "always_dump", False)
         return WrappedNode(
-            value=node,
-            path=path,
-            file_path=file_path,
-            line_no=line_no,
-            quote_style=quote_style,
-            is_anchored=is_anchored,
-            anchor_name=anchor_name,
-            was_aliased=was_aliased,
+            node,
+            path,
+            key,
+            file_path,
+            get_line_no(node),
+            get_quote_style(node),
+            bool(anchor_name),
+            anchor_name,
+            was_aliased,
         )
     else:
         return node
 
+class KeyPathConstructor(RoundTripConstructor):
+    """Round-trip constructor that tracks the KeyPath of every container it builds."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._key_paths = {}
+
+    def construct_document(self, node):
+        try:
+            return super().construct_document(node)
+        finally:
+            self._key_paths = {}
+
+    def _key_path(self, container):
+        key_path = self._key_paths.get(id(container))
+        if key_path is None:
+            key_path = self._key_paths[id(container)] = KeyPath()
+        return key_path
+
+    def _link(self, container, parent_path, key):
+        # Containers are built before their parent knows the key they live under,
+        # so their (already referenced) KeyPath is attached to the parent afterwards.
+        key_path = self._key_path(container)
+        if key_path.parent is None:
+            key_path.parent = parent_path
+            key_path.key = key
+
+
+class WrappingConstructor(KeyPathConstructor):
+    """
+    Round-trip constructor that wraps scalars while the tree is being built.
+
+    Produces the same shape as ``wrap_scalar_nodes`` without a second walk over
+    the loaded tree: mapping values and sequence items are wrapped as their
+    container is constructed, sequences are filled in place (keeping their
+    comments and line info) and items inside sequences are left unwrapped.
+    """
+
+    file_path = ""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sequence_depth = 0
+
+    def construct_mapping(self, node, maptyp, deep=False):
+        super().construct_mapping(node, maptyp, deep=deep)
+        if self._sequence_depth:
+            return
+        path = self._key_path(maptyp)
+        for key_node, value_node in node.value:
+            key = self.constructed_objects.get(key_node)
+            if key is None or key not in maptyp:
+                continue
+            value = maptyp[key]
+            if isinstance(value, (CommentedMap, CommentedSeq)):
+                self._link(value, path, key)
+            elif isinstance(value, (str, int, float, bool, type(None))):
+                anchor = getattr(value, "anchor", None)
+                anchor_name = getattr(anchor, "value", None)
+                maptyp[key] = WrappedNode(
+                    value,
+                    path,
+                    key,
+                    self.file_path,
+                    value_node.start_mark.line + 1,
+                    get_quote_style(value),
+                    bool(anchor_name),
+                    anchor_name,
+                    anchor is not None and getattr(anchor, "always_dump", False),
+                )
+
+    def construct_rt_sequence(self, node, seqtyp, deep=False):
+        # Items are constructed eagerly so nested mappings see the sequence depth.
+        self._sequence_depth += 1
+        try:
+            items = super().construct_rt_sequence(node, seqtyp, deep=True)
+        finally:
+            self._sequence_depth -= 1
+        if self._sequence_depth:
+            return items
+        path = self._key_path(seqtyp)
+        return [
+            WrappedNode(item, path, idx, self.file_path, child.start_mark.line + 1)
+            for idx, (child, item) in enumerate(zip(node.value, items))
+        ]
+
+
+def make_wrapping_yaml(file_path=""):
+    yaml = remove_aliases_yaml()
+    yaml.Constructor = WrappingConstructor
+    yaml.constructor.file_path = file_path
+    return yaml
+
+class AnchorIndex:
+    """
+    Scalar anchors of a target document.
+
+    ``definitions`` maps an anchor name to the key path where it is defined,
+    ``aliases`` to the key paths that alias it and ``by_path`` maps every one
+    of those paths back to the anchor name.
+    """
+
+    def __init__(self):
+        self.definitions = {}
+        self.aliases = {}
+        self.by_path = {}
+
+    def add(self, name, key_path, is_alias):
+        if is_alias:
+            self.aliases.setdefault(name, []).append(key_path)
+        else:
+            self.definitions[name] = key_path
+        self.by_path[key_path] = name
+
+    def paths(self, name):
+        """Definition path followed by every alias path of ``name``."""
+        definition = self.definitions.get(name)
+        return ([definition] if definition is not None else []) + self.aliases.get(name, [])
+
+
+class AliasTrackingComposer(Composer):
+    """Composer that remembers where aliases (rather than anchor definitions) occur."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.alias_sites = set()
+
+    def compose_node(self, parent, index):
+        if parent is not None and index is not None and self.parser.check_event(AliasEvent):
+            self.alias_sites.add((id(parent), index if isinstance(index, int) else id(index)))
+        return super().compose_node(parent, index)
+
+
+class AnchorIndexingConstructor(KeyPathConstructor):
+    """
+    Round-trip constructor that builds an AnchorIndex while constructing.
+
+    Works with AliasTrackingComposer to tell anchor definitions from alias
+    sites; the index of the last document is left in ``anchor_index``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.anchor_index = AnchorIndex()
+        self._anchor_sites = []
+
+    def construct_document(self, node):
+        self.anchor_index = AnchorIndex()
+        try:
+            return super().construct_document(node)
+        finally:
+            # Container KeyPaths are only complete once the whole document is built.
+            for name, path, key, is_alias in self._anchor_sites:
+                self.anchor_index.add(name, path.keys() + (key,), is_alias)
+            self._anchor_sites = []
+            self.loader.composer.alias_sites.clear()
+
+    def _record(self, parent_node, site, value_node, value, path, key):
+        if isinstance(value, (CommentedMap, CommentedSeq)):
+            self._link(value, path, key)
+        elif value_node.anchor:
+            is_alias = (id(parent_node), site) in self.loader.composer.alias_sites
+            self._anchor_sites.append((value_node.anchor, path, key, is_alias))
+
+    def construct_mapping(self, node, maptyp, deep=False):
+        super().construct_mapping(node, maptyp, deep=deep)
+        path = self._key_path(maptyp)
+        for key_node, value_node in node.value:
+            key = self.constructed_objects.get(key_node)
+            if key is None or key not in maptyp:
+                continue
+            self._record(node, id(key_node), value_node, maptyp[key], path, key)
+
+    def construct_rt_sequence(self, node, seqtyp, deep=False):
+        items = super().construct_rt_sequence(node, seqtyp, deep=True)
+        path = self._key_path(seqtyp)
+        for idx, (child, item) in enumerate(zip(node.value, items)):
+            self._record(node, idx, child, item, path, idx)
+        return items
+
+
+def make_anchor_indexing_yaml():
+    yaml = make_yaml()
+    yaml.Composer = AliasTrackingComposer
+    yaml.Constructor = AnchorIndexingConstructor
+    return yaml
+
+def load_yaml_with_anchor_index(file_path):
+    """Round-trip load ``file_path`` and return ``(data, AnchorIndex)``."""
+    yaml = make_anchor_indexing_yaml()
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        data = yaml.load(f)
+    return data, yaml.constructor.anchor_index
+
 def load_yaml_with_wrapped_scalars(file_path):
-    data = load_yaml(file_path, remove_aliases_yaml)
     file_name = Path(file_path).name
-    wrap_scalar_nodes(data, "", file_name)
+    return load_yaml(file_path, lambda: make_wrapping_yaml(file_name))
+
+def load_values_only_with_wrapped_scalars(file_path):
+    """
+    Load ``file_path`` with the C-accelerated safe loader and wrap its scalars.
+
+    Meant for source files, which are only read for their values: the result
+    has plain dicts and lists and wrapped nodes without line, quote or anchor
+    information, so compare and dry-run reports show no source lines for them.
+    """
+    data = load_yaml(file_path, make_values_only_yaml)
+    wrap_scalar_nodes(data, KeyPath(), Path(file_path).name)
     return data
 
+def iter_wrapped_nodes(node):
+    """Yield every WrappedNode in a wrapped tree."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, WrappedNode):
+            yield current
+        elif isinstance(current, dict):
+            stack.extend(current.values())
+        elif isinstance(current, list):
+            stack.extend(current)
+
 def load_yaml(file_path, yaml_method = make_yaml):
     yaml = yaml_method()
     with open(file_path, "r", encoding="utf-8", errors="replace") as f:
         return yaml.load(f)
 
+def top_level_keys(file_path):
+    """Top-level keys of a YAML file as strings, read with the fast safe loader."""
+    data = load_yaml(file_path, make_values_only_yaml)
+    return sorted(str(key) for key in data) if isinstance(data, dict) else []
+
 def dump_yaml(data, output_file_path, yaml_method = make_yaml):
+    """
+    Dump atomically: write a temp file next to the output, then rename it over.
+
+    A symlinked output is written through to the file it points at. The file
+    keeps its mode; a new file gets the usual ``0o666`` less the umask.
+    """
     yaml = yaml_method()
-    with open(output_file_path, "w", encoding="utf-8") as f:
-        yaml.dump(data, f)
+    output_file_path = os.path.realpath(output_file_path)
+    output_dir = os.path.dirname(output_file_path)
+    fd, tmp_path = tempfile.mkstemp(prefix=".merge-", suffix=".tmp", dir=output_dir)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            yaml.dump(data, f)
+        if os.path.exists(output_file_path):
+            shutil.copymode(output_file_path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, output_file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
 def strip_anchor(node):
     if hasattr(node, "anchor"):
         node.anchor.value = None
     return node
 
+def plain_value(value):
+    """A JSON-serializable copy of a wrapped or round-trip value."""
+    if isinstance(value, WrappedNode):
+        value = value.value
+    if isinstance(value, dict):
+        return {str(key): plain_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [plain_value(item) for item in value]
+    if isinstance(value, (bool, ScalarBoolean)):
+        return bool(value)
+    for scalar_type in (int, float, str):
+        if isinstance(value, scalar_type):
+            return scalar_type(value)
+    return None if value is None else str(value)
+
 def _unwrap_value(node):
     return getattr(node, "value", node)
 
-def _get_anchor_name(node):
-    return getattr(getattr(node, "anchor", None), "value", None)
+def _anchored_scalar(old, new_value, anchor_name):
+    """A copy of ``new_value`` carrying ``anchor_name``, or None if it cannot hold an anchor."""
+    if isinstance(new_value, bool):
+        return ScalarBoolean(new_value, anchor=anchor_name)
+    if isinstance(new_value, int):
+        return ScalarInt(new_value, anchor=anchor_name)
+    if isinstance(new_value, float):
+        return ScalarFloat(new_value, anchor=anchor_name)
+    if isinstance(new_value, str):
+        scalar_type = type(old) if isinstance(old, ScalarString) else PlainScalarString
+        return scalar_type(new_value, anchor=anchor_name)
+    return None
 
-def _collect_anchors(node, anchor_map):
-    if isinstance(node, (CommentedMap, dict)):
-        for k, v in node.items():
-            name = _get_anchor_name(v)
-            if name:
-                anchor_map[name] = v
-            _collect_anchors(v, anchor_map)
-    elif isinstance(node, (CommentedSeq, list)):
-        for item in node:
-            name = _get_anchor_name(item)
-            if name:
-                anchor_map[name] = item
-            _collect_anchors(item, anchor_map)
-
-def update_yaml_from_wrapped_data(wrapped_node_dict, target_file_path, output_file_path):
-    target_data = load_yaml(target_file_path)
-    updates_made = []
-    anchor_map = {}
-    _collect_anchors(target_data, anchor_map)
-
-    def recursive_update(wrapped, target, base_path=""):
-        if isinstance(wrapped, (CommentedMap, dict)) and isinstance(target, (CommentedMap, dict)):
-            for key, wrapped_value in wrapped.items():
-                if key not in target:
-                    continue
-                child_path = f"{base_path}.{key}" if base_path else str(key)
-                if isinstance(wrapped_value, WrappedNode):
-                    new_scalar = _unwrap_value(wrapped_value.value)
-                    current_target = target[key]
-                    current_scalar = _unwrap_value(current_target)
-                    if new_scalar != current_scalar:
-                        logger.info(f"Updating {child_path}: {current_scalar!r} -> {new_scalar!r}")
-                        target_anchor_name = _get_anchor_name(current_target)
-                        if target_anchor_name:
-                            if hasattr(current_target, "value"):
-                                current_target.value = new_scalar
-                            else:
-                                target[key] = new_scalar
-                        else:
-                            source_anchor_name = wrapped_value.anchor_name
-                            if source_anchor_name and source_anchor_name in anchor_map:
-                                anchor_node = anchor_map[source_anchor_name]
-                                if hasattr(anchor_node, "value"):
-                                    anchor_node.value = new_scalar
-                                else:
-                                    anchor_map[source_anchor_name] = new_scalar
-                                logger.debug(f" - Updated anchor definition {source_anchor_name}")
-                            else:
-                                target[key] = new_scalar
-                        updates_made.append(child_path)
-                    else:
-                        logger.debug(f"Skipping {child_path} (no change)")
-                else:
-                    recursive_update(wrapped_value, target[key], child_path)
-        elif isinstance(wrapped, (CommentedSeq, list)) and isinstance(target, (CommentedSeq, list)):
-            for idx, item in enumerate(wrapped):
-                child_path = f"{base_path}[{idx}]"
-                if idx < len(target):
-                    if isinstance(item, WrappedNode):
-                        new_scalar = _unwrap_value(item.value)
-                        current_target = target[idx]
-                        current_scalar = _unwrap_value(current_target)
-                        if new_scalar != current_scalar:
-                            logger.info(f"Updating {child_path}: {current_scalar!r} -> {new_scalar!r}")
-                            target_anchor_name = _get_anchor_name(current_target)
-                            if target_anchor_name and hasattr(current_target, "value"):
-                                current_target.value = new_scalar
-                            else:
-                                source_anchor_name = item.anchor_name
-                                if source_anchor_name and source_anchor_name in anchor_map:
-                                    anchor_node = anchor_map[source_anchor_name]
-                                    if hasattr(anchor_node, "value"):
-                                        anchor_node.value = new_scalar
-                                    else:
-                                        anchor_map[source_anchor_name] = new_scalar
-                                    logger.debug(f" - Updated anchor definition {source_anchor_name}")
-                                else:
-                                    target[idx] = new_scalar
-                            updates_made.append(child_path)
-                        else:
-                            logger.debug(f"Skipping {child_path} (no change)")
+def _unanchored_scalar(old):
+    """A copy of an anchored scalar without the anchor."""
+    if isinstance(old, ScalarBoolean):
+        return bool(old)
+    if isinstance(old, ScalarInt):
+        return int(old)
+    if isinstance(old, ScalarFloat):
+        return float(old)
+    if isinstance(old, ScalarString):
+        return type(old)(str(old))
+    return old
+
+def build_path_index(wrapped_data):
+    """
+    Flatten a wrapped tree into ``{key_path: WrappedNode}`` in document order.
+
+    Key paths are tuples of mapping keys and sequence indices for the node's
+    position in ``wrapped_data`` (see ``format_key_path`` for the ``a.b[2].c`` form).
+    """
+    index = {}
+    stack = [((), wrapped_data)]
+    while stack:
+        key_path, node = stack.pop()
+        if isinstance(node, WrappedNode):
+            index[key_path] = node
+        elif isinstance(node, dict):
+            stack.extend((key_path + (k,), v) for k, v in reversed(list(node.items())))
+        elif isinstance(node, list):
+            stack.extend((key_path + (idx,), item) for idx, item in reversed(list(enumerate(node))))
+    return index
+
+def index_containers(data):
+    """Map the key path of every mapping and sequence in ``data`` to the container."""
+    containers = {}
+    stack = [((), data)]
+    while stack:
+        key_path, node = stack.pop()
+        if isinstance(node, dict):
+            containers[key_path] = node
+            stack.extend((key_path + (k,), v) for k, v in node.items())
+        elif isinstance(node, list):
+            containers[key_path] = node
+            stack.extend((key_path + (idx,), item) for idx, item in enumerate(node))
+    return containers
+
+class KeyOwnership:
+    """
+    The key paths a target file defines: every mapping key and sequence index,
+    in document order, plus the length of each sequence for appends.
+    """
+
+    __slots__ = ("paths", "sequence_lengths")
+
+    def __init__(self, paths, sequence_lengths):
+        self.paths = paths
+        self.sequence_lengths = sequence_lengths
+
+    @classmethod
+    def from_data(cls, data):
+        paths = []
+        sequence_lengths = {}
+        stack = [((), data)]
+        while stack:
+            key_path, node = stack.pop()
+            if key_path:
+                paths.append(key_path)
+            if isinstance(node, dict):
+                stack.extend((key_path + (k,), v) for k, v in reversed(list(node.items())))
+            elif isinstance(node, list):
+                sequence_lengths[key_path] = len(node)
+                stack.extend((key_path + (idx,), item) for idx, item in reversed(list(enumerate(node))))
+        return cls(paths, sequence_lengths)
+
+    def matching(self, path_index):
+        """
+        The key paths of ``path_index`` that :func:`plan_updates` could apply here.
+
+        Those are the paths this file defines, then items past the end of its
+        sequences; the join walks this file's paths, not the whole index.
+        """
+        matches = [key_path for key_path in self.paths if key_path in path_index]
+        for sequence_path, length in self.sequence_lengths.items():
+            idx = length
+            while sequence_path + (idx,) in path_index:
+                matches.append(sequence_path + (idx,))
+                idx += 1
+        return matches
+
+def load_key_ownership(file_path):
+    """The :class:`KeyOwnership` of a target file, read with the fast safe loader."""
+    return KeyOwnership.from_data(load_yaml(file_path, make_values_only_yaml))
+
+class PlannedUpdate:
+    """
+    One change to apply to a target: set or append ``new`` at ``container[key]``.
+
+    When the change lands on an anchored scalar, ``anchor`` names the anchor,
+    ``anchor_paths`` lists the sites (this one included) that keep sharing it
+    and change with it, and ``detached_paths`` the sites the source gives a
+    different value, which stop aliasing it.
+    """
+
+    __slots__ = (
+        "key_path",
+        "container",
+        "key",
+        "old",
+        "new",
+        "wrapped",
+        "append",
+        "anchor",
+        "anchor_paths",
+        "detached_paths",
+    )
+
+    def __init__(
+        self,
+        key_path,
+        container,
+        key,
+        old,
+        new,
+        wrapped,
+        append=False,
+        anchor=None,
+        anchor_paths=(),
+        detached_paths=(),
+    ):
+        self.key_path = key_path
+        self.container = container
+        self.key = key
+        self.old = old
+        self.new = new
+        self.wrapped = wrapped
+        self.append = append
+        self.anchor = anchor
+        self.anchor_paths = anchor_paths
+        self.detached_paths = detached_paths
+
+    @property
+    def path(self):
+        return format_key_path(self.key_path)
+
+    def to_record(self, file_path):
+        """A JSON-serializable description of the update, as shown by a dry run."""
+        return {
+            "file": file_path,
+            "path": self.path,
+            "old": plain_value(self.old),
+            "new": plain_value(self.new),
+            "append": self.append,
+            "source_file": self.wrapped.file_path or None,
+            "source_line": self.wrapped.line_no,
+            "anchor": self.anchor,
+            "also_affects": [format_key_path(p) for p in self.anchor_paths if p != self.key_path],
+        }
+
+def _follows_anchor(path_index, anchor_path, key_path, new_scalar):
+    """True when the anchor site ``anchor_path`` takes ``new_scalar`` along with ``key_path``."""
+    if anchor_path is None:
+        return False
+    if anchor_path == key_path:
+        return True
+    node = path_index.get(anchor_path)
+    return node is None or _unwrap_value(node.value) == new_scalar
+
+def plan_updates(path_index, target_data, containers=None, anchor_index=None):
+    """
+    Join a source path index against ``target_data`` and return the PlannedUpdates.
+
+    A source leaf applies when the target has a container at the leaf's parent
+    path holding its key (or, for sequences, it is appended past the end).
+    ``anchor_index`` (see :func:`load_yaml_with_anchor_index`) resolves changes
+    to anchored scalars to the anchor definition and its aliases, except for
+    the alias sites the source gives a different value.
+    """
+    if containers is None:
+        containers = index_containers(target_data)
+    planned = []
+    for key_path, wrapped in path_index.items():
+        container = containers.get(key_path[:-1])
+        if container is None:
+            continue
+        key = key_path[-1]
+        new_scalar = _unwrap_value(wrapped.value)
+        if wrapped.anchor_name:
+            # Source anchors mean nothing in the target and may clash with its own.
+            new_scalar = _unanchored_scalar(new_scalar)
+        if isinstance(container, dict):
+            if key not in container:
+                continue
+        elif type(key) is int:
+            if key >= len(container):
+                planned.append(PlannedUpdate(key_path, container, key, None, new_scalar, wrapped, append=True))
+                continue
+        else:
+            continue
+        current_target = container[key]
+        current_scalar = _unwrap_value(current_target)
+        if new_scalar == current_scalar:
+            logger.debug(f"Skipping {format_key_path(key_path)} (no change)")
+            continue
+        update = PlannedUpdate(key_path, container, key, current_target, new_scalar, wrapped)
+        anchor = anchor_index.by_path.get(key_path) if anchor_index is not None else None
+        if anchor is not None:
+            definition = anchor_index.definitions.get(anchor)
+            if _follows_anchor(path_index, definition, key_path, new_scalar):
+                # Alias sites the source gives another value stop sharing the anchor.
+                update.anchor = anchor
+                update.anchor_paths = []
+                update.detached_paths = []
+                for anchor_path in anchor_index.paths(anchor):
+                    if _follows_anchor(path_index, anchor_path, key_path, new_scalar):
+                        update.anchor_paths.append(anchor_path)
                     else:
-                        recursive_update(item, target[idx], child_path)
-                else:
-                    val_to_append = _unwrap_value(item.value) if isinstance(item, WrappedNode) else item
-                    target.append(val_to_append)
-                    updates_made.append(child_path)
+                        update.detached_paths.append(anchor_path)
+            # Otherwise the source gives the definition another value and only
+            # this alias site changes, as a plain value.
+        planned.append(update)
+    return planned
+
+def apply_updates(planned, containers=None):
+    """Apply PlannedUpdates in order and return the updated paths."""
+    updates_made = []
+    for update in planned:
+        child_path = update.path
+        container, key, new_scalar = update.container, update.key, update.new
+        if update.append:
+            container.append(new_scalar)
+            updates_made.append(child_path)
+            continue
+        logger.info(f"Updating {child_path}: {_unwrap_value(update.old)!r} -> {new_scalar!r}")
+        anchored = None
+        if update.anchor and containers is not None:
+            anchored = _anchored_scalar(update.old, new_scalar, update.anchor)
+        if anchored is None:
+            container[key] = new_scalar
+        else:
+            for anchor_path in update.anchor_paths:
+                containers[anchor_path[:-1]][anchor_path[-1]] = anchored
+            for anchor_path in update.detached_paths:
+                # Sites still aliasing the old anchor keep their value, unanchored.
+                parent = containers[anchor_path[:-1]]
+                if parent[anchor_path[-1]] is update.old:
+                    parent[anchor_path[-1]] = _unanchored_scalar(update.old)
+            logger.debug(
+                f" - Updated anchor {update.anchor}, also affects: "
+                f"{', '.join(format_key_path(p) for p in update.anchor_paths if p != update.key_path)}"
+            )
+        updates_made.append(child_path)
+    return updates_made
+
+def plan_yaml_file(target_file_path, path_index):
+    """The PlannedUpdates for one target file, without applying or writing them."""
+    target_data, anchor_index = load_yaml_with_anchor_index(target_file_path)
+    return plan_updates(path_index, target_data, anchor_index=anchor_index)
+
+def update_yaml_from_wrapped_data(wrapped_node_dict, target_file_path, output_file_path, path_index=None):
+    """
+    Apply wrapped source values to the target file and return the updated paths.
+
+    Pass a prebuilt ``path_index`` (see :func:`build_path_index`) when the same
+    source is applied to many targets.
+    """
+    if path_index is None:
+        path_index = build_path_index(wrapped_node_dict)
+    target_data, anchor_index = load_yaml_with_anchor_index(target_file_path)
+    containers = index_containers(target_data)
 
-    recursive_update(wrapped_node_dict, target_data, "")
+    planned = plan_updates(path_index, target_data, containers, anchor_index)
+    updates_made = apply_updates(planned, containers)
+    if not updates_made and os.path.abspath(output_file_path) == os.path.abspath(target_file_path):
+        logger.debug(f"No changes for {target_file_path}, skipping write")
+        return updates_made
     dump_yaml(target_data, output_file_path)
     logger.info(f"Update complete. {len(updates_made)} paths updated.")
     return updates_made
@@ -0,0 +1,123 @@
+import logging
+
+from ..common.utils import format_key_path, merge_trees
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+WILDCARD = "*"
+
+
+class _TrieNode:
+    __slots__ = ("children", "target")
+
+    def __init__(self):
+        self.children = {}
+        self.target = None
+
+
+class KeyRemapper:
+    """
+    ``source:target`` key mappings compiled into a trie over dotted key paths.
+
+    A mapping moves the subtree at ``source`` to ``target``; an empty target
+    drops it. ``*`` matches any single key and the matched keys fill the
+    target's ``*`` in order, so ``global.images.*:images.*`` moves every
+    child of ``global.images``. When mappings overlap, the most specific
+    one wins for the keys it covers.
+    """
+
+    def __init__(self, mappings=()):
+        self.root = _TrieNode()
+        for source, target in mappings:
+            self.add(source, target)
+
+    def __bool__(self):
+        return bool(self.root.children)
+
+    def add(self, source, target):
+        source_keys = tuple(source.split("."))
+        target_keys = tuple(target.split(".")) if target else None
+        if target_keys is not None and target_keys.count(WILDCARD) != source_keys.count(WILDCARD):
+            raise ValueError(f"Key mapping {source}:{target} must use the same number of '{WILDCARD}' on both sides")
+        node = self.root
+        for key in source_keys:
+            node = node.children.setdefault(key, _TrieNode())
+        node.target = ("drop",) if target_keys is None else ("move", target_keys)
+
+    @staticmethod
+    def _target_path(target_keys, captures):
+        captured = iter(captures)
+        return tuple(next(captured) if key == WILDCARD else key for key in target_keys)
+
+    def remap(self, data):
+        """
+        Return ``data`` with every mapping applied, in one traversal of the mapped keys.
+
+        Subtrees no mapping reaches are shared with ``data``, not copied; only
+        mappings whose source exists in ``data`` have any effect.
+        """
+        if not self or not isinstance(data, dict):
+            return data
+        result = {}
+        owned = {id(result)}
+        # (key, value, candidate trie nodes of the parent, output path of the parent).
+        # Candidates are (trie node, wildcard captures) pairs, most specific first: an
+        # exact key sorts before ``*`` at the first position where two mappings differ.
+        # A ``None`` output path marks a dropped subtree a more specific mapping may
+        # still move parts of. One entry per key so the result keeps the document order.
+        root = [(self.root, ())]
+        stack = [(key, value, root, ()) for key, value in reversed(list(data.items()))]
+        while stack:
+            key, value, candidates, out_path = stack.pop()
+            matches = []
+            for trie, captures in candidates:
+                exact = trie.children.get(key)
+                if exact is not None:
+                    matches.append((exact, captures))
+                wildcard = trie.children.get(WILDCARD)
+                if wildcard is not None:
+                    matches.append((wildcard, captures + (key,)))
+
+            child_path = out_path + (key,) if out_path is not None else None
+            for index, (child, captures) in enumerate(matches):
+                if child.target is not None:
+                    # Less specific candidates can only lead to less specific mappings.
+                    del matches[index + 1 :]
+                    if child.target[0] == "drop":
+                        if child_path is not None:
+                            logger.debug(f"Dropping remapped key {format_key_path(child_path)}")
+                        child_path = None
+                    else:
+                        child_path = self._target_path(child.target[1], captures)
+                    break
+
+            matches = [(child, captures) for child, captures in matches if child.children]
+            if matches and isinstance(value, dict) and value:
+                stack.extend(
+                    (child_key, child_value, matches, child_path)
+                    for child_key, child_value in reversed(list(value.items()))
+                )
+            elif child_path is not None:
+                self._place(result, owned, child_path, value)
+        return result
+
+    @staticmethod
+    def _place(result, owned, path, value):
+        """Set ``path`` in ``result``, copying shared mappings on the way instead of mutating them."""
+        node = result
+        for key in path[:-1]:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                child = node[key] = {}
+                owned.add(id(child))
+            elif id(child) not in owned:
+                child = node[key] = child.copy()
+                owned.add(id(child))
+            node = child
+        current = node.get(path[-1])
+        if isinstance(current, dict) and isinstance(value, dict):
+            node[path[-1]] = merged = merge_trees(current, value)
+            owned.discard(id(merged))
+        else:
+            node[path[-1]] = value
@@ -0,0 +1,174 @@
+import logging
+import os
+import time
+
+from .chart import (
+    disabled_components,
+    dump_consolidated_data_to_helm_chart,
+    layer_values,
+    load_values_files,
+    prune_components,
+    resolve_values_files,
+)
+from .metadata import load_chart_metadata
+from .incremental import value_hashes
+from .iterators import iter_yaml_files
+from .processor import build_path_index, top_level_keys
+from .remap import KeyRemapper
+from .validators import is_helm_chart
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def _file_signature(file_path):
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ChartWatcher:
+    """
+    Keep a source chart's parsed values files in memory and merge changes into a target.
+
+    Changes are found by polling ``os.stat`` of the ``values_order`` files, so
+    no file system notification service is needed. Only changed files are
+    parsed again; the values are re-layered and written back to the target
+    files that own a top-level key whose values changed.
+    """
+
+    def __init__(
+        self,
+        source_path,
+        target_path,
+        values_order,
+        source_config=None,
+        target_config=None,
+        workers=None,
+        values_only=False,
+        list_policies=None,
+        key_mappings=None,
+        filename_mappings=None,
+        remove_disabled=False,
+    ):
+        if not is_helm_chart(source_path):
+            raise ValueError(f"{source_path} is not a valid Helm chart (missing Chart.yaml)")
+        self.source_path = source_path
+        self.target_path = target_path
+        self.values_order = values_order
+        self.source_config = dict(source_config or {})
+        self.target_config = dict(target_config or {})
+        self.workers = workers
+        self.values_only = values_only
+        self.list_policies = list_policies
+        self.remapper = KeyRemapper(key_mappings or ())
+        self.filename_mappings = filename_mappings
+        self.chart_meta = load_chart_metadata(source_path) if remove_disabled else None
+
+        self.signatures = {}
+        self.processed_files = {}
+        self.values = {}
+        self.target_keys = {}
+
+    def _source_files(self):
+        return resolve_values_files(self.source_path, self.values_order, **self.source_config)
+
+    def _load(self, yaml_files):
+        """Parse ``yaml_files``; only the files that load are recorded, so the others are retried."""
+        signatures = {yaml_file: _file_signature(yaml_file) for yaml_file in yaml_files}
+        loaded = load_values_files(self.source_path, yaml_files, workers=self.workers, values_only=self.values_only)
+        for yaml_file, signature in signatures.items():
+            if os.path.relpath(yaml_file, self.source_path) in loaded:
+                self.signatures[yaml_file] = signature
+        return loaded
+
+    def _apply(self):
+        """Re-layer the resident files and update the targets owning a top-level key that changed."""
+        processed_files = self.processed_files
+        if self.chart_meta is not None:
+            disabled = disabled_components(self.chart_meta, self.source_path, processed_files, self.values_order)
+            processed_files = prune_components(processed_files, disabled)
+        processed_data = self.remapper.remap(layer_values(processed_files, self.values_order, self.list_policies))
+        path_index = build_path_index(processed_data)
+        values = value_hashes(path_index)
+        changed_keys = {key for key in values.keys() | self.values.keys() if values.get(key) != self.values.get(key)}
+        self.values = values
+
+        yaml_files = []
+        target_keys = {}
+        for yaml_file in iter_yaml_files(self.target_path, **self.target_config):
+            keys = self.target_keys.get(yaml_file)
+            if keys is None:
+                try:
+                    keys = top_level_keys(yaml_file)
+                except Exception as e:
+                    logger.error(f"Error reading {yaml_file}: {e}", exc_info=e)
+                    continue
+            target_keys[yaml_file] = keys
+            if changed_keys.intersection(keys):
+                yaml_files.append(yaml_file)
+        self.target_keys = target_keys
+
+        if not yaml_files:
+            return {}
+        return dump_consolidated_data_to_helm_chart(
+            processed_data,
+            self.target_path,
+            workers=self.workers,
+            path_index=path_index,
+            yaml_files=yaml_files,
+            filename_mappings=self.filename_mappings,
+        )
+
+    def start(self):
+        """Parse every values file and merge the layered values into the target."""
+        yaml_files = self._source_files()
+        self.processed_files = self._load(yaml_files)
+        return self._apply()
+
+    def poll(self):
+        """
+        Pick up changed, new and removed values files; returns the write-back summary.
+
+        Files that fail to parse are logged and retried on the next poll.
+        """
+        yaml_files = self._source_files()
+        changed = [yaml_file for yaml_file in yaml_files if self.signatures.get(yaml_file) != _file_signature(yaml_file)]
+        removed = [yaml_file for yaml_file in self.signatures if yaml_file not in yaml_files]
+        if not changed and not removed:
+            return {}
+
+        for yaml_file in removed:
+            logger.info(f"Values file removed: {yaml_file}")
+            del self.signatures[yaml_file]
+            self.processed_files.pop(os.path.relpath(yaml_file, self.source_path), None)
+        for yaml_file in changed:
+            logger.info(f"Values file changed: {yaml_file}")
+        # A file that fails to load (say, saved half-typed) keeps its last good
+        # values until it parses again.
+        loaded = self._load(changed)
+        if not loaded and not removed:
+            return {}
+        self.processed_files.update(loaded)
+        return self._apply()
+
+    def run(self, interval=DEFAULT_POLL_INTERVAL, max_polls=None, on_update=None):
+        """
+        Merge once, then poll every ``interval`` seconds until interrupted.
+
+        ``on_update`` is called with each non-empty write-back summary.
+        """
+        summary = self.start()
+        if on_update is not None:
+            on_update(summary)
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            time.sleep(interval)
+            polls += 1
+            summary = self.poll()
+            if summary and on_update is not None:
+                on_update(summary)
@@ -1,10 +1,46 @@
 """
-    Dummy conftest.py for merge.
+    Shared fixtures for the merge tests.
 
-    If you don't know what this is for, just leave it empty.
     Read more about conftest.py under:
     - https://docs.pytest.org/en/stable/fixture.html
     - https://docs.pytest.org/en/stable/writing_plugins.html
 """
 
-# import pytest
+import os
+
+import pytest
+
+
+def _make_chart(root, files):
+    os.makedirs(os.path.join(root, "templates"), exist_ok=True)
+    files = {"Chart.yaml": "apiVersion: v2\nname: documentum\nappVersion: '25.4'\n", **files}
+    for rel_path, text in files.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return str(root)
+
+
+@pytest.fixture
+def values_order():
+    return ["./config/configuration.yml", "./platforms/anthos.yaml", "./documentum-components.yaml"]
+
+
+@pytest.fixture
+def make_chart():
+    """Write a chart from ``{rel_path: text}`` (a minimal Chart.yaml is added) and return its path."""
+    return _make_chart
+
+
+@pytest.fixture
+def source_chart(make_chart, tmp_path):
+    return make_chart(
+        tmp_path / "source",
+        {
+            "config/configuration.yml": "global:\n  version: '25.4'\n  timeout: 30\ncs:\n  replicas: 1\n",
+            "platforms/anthos.yaml": "global:\n  timeout: 60\n",
+            "documentum-components.yaml": "cs:\n  replicas: 3\n",
+            "unused.yaml": "this: [is, not, layered\n",
+        },
+    )
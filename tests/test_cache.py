@@ -0,0 +1,32 @@
+import os
+
+from merge.helm_hander.cache import ParseCache
+
+__author__ = "Kartik nataraj subramanian"
+__copyright__ = "Kartik nataraj subramanian"
+__license__ = "MIT"
+
+
+def test_parse_cache_hits_and_evicts(tmp_path):
+    """Unchanged files are served from the cache, old entries are evicted"""
+    calls = []
+
+    def loader(file_path):
+        calls.append(file_path)
+        return {"file": os.path.basename(file_path)}
+
+    cache = ParseCache(cache_dir=str(tmp_path / "cache"), loader=loader)
+    values = tmp_path / "values.yaml"
+    values.write_text("a: 1\n")
+
+    assert cache.load(str(values)) == {"file": "values.yaml"}
+    assert cache.load(str(values)) == {"file": "values.yaml"}
+    assert len(calls) == 1
+
+    values.write_text("a: 2\n")
+    cache.load(str(values))
+    assert len(calls) == 2
+
+    cache.max_bytes = 0
+    cache.evict()
+    assert os.listdir(cache.cache_dir) == []
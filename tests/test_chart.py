@@ -0,0 +1,227 @@
+import os
+
+from merge.helm_hander import (
+    consolidated_helm_chart_data,
+    dump_consolidated_data_to_helm_chart,
+    dump_consolidated_data_to_helm_charts,
+    plan_consolidated_data_for_helm_chart,
+)
+from merge.helm_hander import chart
+from merge.helm_hander.chart import map_target_files, route_file
+from merge.helm_hander.metadata import resolve_enabled_flags
+from merge.helm_hander.processor import load_key_ownership
+
+__author__ = "Kartik nataraj subramanian"
+__copyright__ = "Kartik nataraj subramanian"
+__license__ = "MIT"
+
+
+def test_values_order_is_layered(source_chart, values_order):
+    """Later values files override earlier ones; other files are not parsed"""
+    app_version, data, index = consolidated_helm_chart_data(source_chart, values_order=values_order)
+
+    assert app_version == "25.4"
+    assert {path: node.value for path, node in index.items()} == {
+        ("global", "version"): "25.4",
+        ("global", "timeout"): 60,
+        ("cs", "replicas"): 3,
+    }
+    assert data["global"]["timeout"].file_path == os.path.join("platforms", "anthos.yaml")
+
+
+def test_process_pool_parse_keeps_values_order_and_skips_broken_files(make_chart, tmp_path, caplog):
+    """With workers > 1 files are layered in values_order; a file that fails to parse is logged and left out"""
+    files = {f"values/{name}.yaml": f"{name}: 1\nlast: {name}\n" for name in ("d", "c", "b", "a")}
+    files["values/broken.yaml"] = "broken: [1\n"
+    source = make_chart(tmp_path / "source", files)
+    order = ["values/d.yaml", "values/broken.yaml", "values/c.yaml", "values/b.yaml", "values/a.yaml"]
+
+    _, data, index = consolidated_helm_chart_data(source, values_order=order, workers=2)
+
+    assert list(index) == [("d",), ("last",), ("c",), ("b",), ("a",)]
+    assert data["last"].value == "a"
+    assert data["last"].file_path == os.path.join("values", "a.yaml")
+    assert "broken" not in data
+    assert any("broken.yaml" in record.getMessage() for record in caplog.records if record.levelname == "ERROR")
+
+
+def test_dump_updates_matching_target_keys(source_chart, make_chart, values_order, tmp_path):
+    """Consolidated values are written to the target's matching keys only"""
+    target_chart = make_chart(tmp_path / "target", {"values.yaml": "global:\n  version: '24.4'\nother: 1\n"})
+    _, data, index = consolidated_helm_chart_data(source_chart, values_order=values_order)
+
+    summary = dump_consolidated_data_to_helm_chart(data, target_chart, exclude_files=["Chart.yaml"], path_index=index)
+
+    assert summary == {os.path.join(target_chart, "values.yaml"): ["global.version"]}
+    with open(os.path.join(target_chart, "values.yaml"), encoding="utf-8") as f:
+        assert f.read() == "global:\n  version: '25.4'\nother: 1\n"
+
+
+def test_batch_dump_aggregates_results_per_target(source_chart, make_chart, values_order, tmp_path):
+    """Every target gets its own summary; a broken target does not stop the others"""
+    good = make_chart(tmp_path / "good", {"values.yaml": "cs:\n  replicas: 1\n"})
+    broken = make_chart(tmp_path / "broken", {"values.yaml": "cs: [unclosed\n"})
+    missing = str(tmp_path / "missing")
+    _, data, index = consolidated_helm_chart_data(source_chart, values_order=values_order)
+
+    results = dump_consolidated_data_to_helm_charts(
+        data, [good, broken, missing], exclude_files=["Chart.yaml"], workers=2, pool="thread", path_index=index
+    )
+
+    assert results[good] == ({os.path.join(good, "values.yaml"): ["cs.replicas"]}, {})
+    assert list(results[broken][1]) == [os.path.join(broken, "values.yaml")]
+    assert results[missing] == ({}, {missing: "not a valid Helm chart (missing Chart.yaml)"})
+
+
+def test_plan_reports_updates_without_writing(source_chart, make_chart, values_order, tmp_path):
+    """A dry run lists every planned change, with anchor effects, and leaves the target alone"""
+    text = "global:\n  timeout: &t 10\ncs:\n  replicas: 1\n  timeout: *t\n"
+    target_chart = make_chart(tmp_path / "target", {"values.yaml": text})
+    _, data, index = consolidated_helm_chart_data(source_chart, values_order=values_order)
+
+    records = list(plan_consolidated_data_for_helm_chart(data, target_chart, exclude_files=["Chart.yaml"], path_index=index))
+
+    assert [(r["path"], r["old"], r["new"], r["anchor"], r["also_affects"]) for r in records] == [
+        ("global.timeout", 10, 60, "t", ["cs.timeout"]),
+        ("cs.replicas", 1, 3, None, []),
+    ]
+    assert records[0]["source_file"] == os.path.join("platforms", "anthos.yaml")
+    with open(os.path.join(target_chart, "values.yaml"), encoding="utf-8") as f:
+        assert f.read() == text
+
+
+def test_routing_by_key_ownership_and_filename_mappings(source_chart, make_chart, values_order, tmp_path):
+    """Targets get only the source paths they define; mapped source files go to mapped targets only"""
+    target_chart = make_chart(
+        tmp_path / "target",
+        {"a.yaml": "cs:\n  replicas: 1\n", "b.yaml": "cs:\n  replicas: 1\nglobal:\n  timeout: 1\n"},
+    )
+    a_yaml, b_yaml = os.path.join(target_chart, "a.yaml"), os.path.join(target_chart, "b.yaml")
+    _, data, index = consolidated_helm_chart_data(source_chart, values_order=values_order)
+
+    mapped_targets = map_target_files([a_yaml, b_yaml], [("documentum-components.yaml", "b.yaml")], target_chart)
+    assert mapped_targets == {"documentum-components.yaml": {b_yaml}}
+    assert list(route_file(index, load_key_ownership(a_yaml), a_yaml, mapped_targets)) == []
+    assert list(route_file(index, load_key_ownership(b_yaml), b_yaml, mapped_targets)) == [
+        ("cs", "replicas"),
+        ("global", "timeout"),
+    ]
+    assert route_file(index, None, a_yaml, mapped_targets) is index
+
+    summary = dump_consolidated_data_to_helm_chart(
+        data,
+        target_chart,
+        exclude_files=["Chart.yaml"],
+        path_index=index,
+        filename_mappings=[("documentum-components.yaml", "b.yaml")],
+    )
+    assert summary == {a_yaml: [], b_yaml: ["cs.replicas", "global.timeout"]}
+    with open(a_yaml, encoding="utf-8") as f:
+        assert f.read() == "cs:\n  replicas: 1\n"
+
+
+def test_filename_mappings_with_a_directory_only_match_that_source_file(make_chart, tmp_path):
+    """config/values.yaml:x.yaml reroutes that file only, not a root values.yaml"""
+    source = make_chart(
+        tmp_path / "source",
+        {"values.yaml": "a:\n  root: 2\n", "config/values.yaml": "a:\n  nested: 2\n"},
+    )
+    target_chart = make_chart(
+        tmp_path / "target",
+        {"x.yaml": "a:\n  root: 1\n  nested: 1\n", "y.yaml": "a:\n  root: 1\n  nested: 1\n"},
+    )
+    x_yaml, y_yaml = os.path.join(target_chart, "x.yaml"), os.path.join(target_chart, "y.yaml")
+    _, data, index = consolidated_helm_chart_data(source, values_order=["values.yaml", "config/values.yaml"])
+
+    summary = dump_consolidated_data_to_helm_chart(
+        data,
+        target_chart,
+        exclude_files=["Chart.yaml"],
+        path_index=index,
+        filename_mappings=[("config/values.yaml", "x.yaml")],
+    )
+    assert summary == {x_yaml: ["a.root", "a.nested"], y_yaml: ["a.root"]}
+
+
+def test_workers_route_each_file_themselves(source_chart, make_chart, values_order, tmp_path):
+    """With a process pool the key index and routing happen in the worker that updates the file"""
+    target_chart = make_chart(
+        tmp_path / "target",
+        {"a.yaml": "cs:\n  replicas: 1\n", "b.yaml": "cs:\n  replicas: 1\nglobal:\n  timeout: 1\n", "c.yaml": "x: 1\n"},
+    )
+    a_yaml, b_yaml, c_yaml = (os.path.join(target_chart, name) for name in ("a.yaml", "b.yaml", "c.yaml"))
+    _, data, index = consolidated_helm_chart_data(source_chart, values_order=values_order)
+
+    summary = dump_consolidated_data_to_helm_chart(
+        data,
+        target_chart,
+        exclude_files=["Chart.yaml"],
+        workers=2,
+        path_index=index,
+        filename_mappings=[("documentum-components.yaml", "b.yaml")],
+    )
+    assert summary == {a_yaml: [], b_yaml: ["cs.replicas", "global.timeout"], c_yaml: []}
+
+
+def test_disabled_components_are_pruned_before_layering(make_chart, values_order, tmp_path):
+    """Enabled flags are resolved from the values files; disabled components are not merged"""
+    chart_yaml = (
+        "apiVersion: v2\nname: documentum\nappVersion: '25.4'\ndependencies:\n"
+        "- name: cs\n  condition: cs.enabled\n- name: da\n- name: otds\n  condition: otds.install\n"
+    )
+    source = make_chart(
+        tmp_path / "source",
+        {
+            "Chart.yaml": chart_yaml,
+            "config/configuration.yml": "cs:\n  enabled: true\n  replicas: 2\notds:\n  install: false\n  replicas: 2\n",
+            "documentum-components.yaml": "cs:\n  enabled: false\nda:\n  replicas: 2\n",
+        },
+    )
+
+    _, data, index = consolidated_helm_chart_data(source, remove_disabled=True, values_order=values_order)
+
+    assert list(data) == ["da"]
+    assert list(index) == [("da", "replicas")]
+
+
+def test_target_files_of_disabled_components_are_not_parsed_or_written(
+    make_chart, values_order, tmp_path, monkeypatch
+):
+    """A target file holding only a disabled component's keys is neither loaded for update nor rewritten"""
+    chart_yaml = "apiVersion: v2\nname: documentum\nappVersion: '25.4'\ndependencies:\n- name: cs\n- name: da\n"
+    source = make_chart(
+        tmp_path / "source",
+        {
+            "Chart.yaml": chart_yaml,
+            "config/configuration.yml": "cs:\n  enabled: false\n  replicas: 2\nda:\n  replicas: 2\n",
+        },
+    )
+    target = make_chart(tmp_path / "target", {"cs.yaml": "cs:\n  replicas: 1\n", "da.yaml": "da:\n  replicas: 1\n"})
+    cs_yaml, da_yaml = os.path.join(target, "cs.yaml"), os.path.join(target, "da.yaml")
+    cs_stat = os.stat(cs_yaml)
+
+    updated = []
+    update = chart.update_yaml_from_wrapped_data
+
+    def spy(wrapped_data, target_file_path, *args, **kwargs):
+        updated.append(target_file_path)
+        return update(wrapped_data, target_file_path, *args, **kwargs)
+
+    monkeypatch.setattr(chart, "update_yaml_from_wrapped_data", spy)
+    _, data, index = consolidated_helm_chart_data(source, remove_disabled=True, values_order=values_order)
+    summary = dump_consolidated_data_to_helm_chart(data, target, exclude_files=["Chart.yaml"], path_index=index)
+
+    assert updated == [da_yaml]
+    assert summary == {cs_yaml: [], da_yaml: ["da.replicas"]}
+    assert os.stat(cs_yaml).st_mtime_ns == cs_stat.st_mtime_ns
+    with open(cs_yaml, encoding="utf-8") as f:
+        assert f.read() == "cs:\n  replicas: 1\n"
+
+
+def test_enabled_flags_follow_the_first_condition_path_that_is_set():
+    """Each condition path is resolved over all layers before the first set path decides"""
+    conditions = {"otds": ["otds.enabled", "global.otds.enabled"], "da": ["da.enabled"]}
+    layers = [{"otds": {"enabled": True}}, {"global": {"otds": {"enabled": False}}, "da": {"enabled": False}}]
+
+    assert resolve_enabled_flags(conditions, layers) == {"otds": True, "da": False}
+    assert resolve_enabled_flags(conditions, layers[1:]) == {"otds": False, "da": False}
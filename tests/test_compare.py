@@ -0,0 +1,47 @@
+import json
+import os
+
+from merge.helm_hander import consolidated_helm_chart_data
+from merge.helm_hander.compare import compare_helm_chart, iter_differences
+from merge.helm_hander.processor import load_yaml, load_yaml_with_wrapped_scalars
+
+__author__ = "Kartik nataraj subramanian"
+__copyright__ = "Kartik nataraj subramanian"
+__license__ = "MIT"
+
+
+def test_iter_differences_reports_paths_with_locations(tmp_path):
+    """Added, removed and changed paths carry source and target lines"""
+    (tmp_path / "s.yaml").write_text("a:\n  b: 2\n  c: [1, 2]\n  new: {x: 1}\nflag: true\n")
+    (tmp_path / "t.yaml").write_text("a:\n  b: 1\n  c: [1]\n  old: x\nflag: 1\n")
+
+    records = list(
+        iter_differences(load_yaml_with_wrapped_scalars(str(tmp_path / "s.yaml")), load_yaml(str(tmp_path / "t.yaml")), "t.yaml")
+    )
+
+    assert [(r["change"], r["path"]) for r in records] == [
+        ("changed", "a.b"),
+        ("added", "a.c[1]"),
+        ("added", "a.new"),
+        ("removed", "a.old"),
+        ("changed", "flag"),
+    ]
+    assert (records[0]["source_line"], records[0]["target_line"], records[0]["target"]) == (2, 2, 1)
+    assert records[2]["source"] == {"x": 1}
+
+
+def test_compare_helm_chart_streams_jsonl_report(source_chart, make_chart, values_order, tmp_path):
+    """One JSON record per difference; top-level keys no target holds are reported once"""
+    target_chart = make_chart(tmp_path / "target", {"values.yaml": "global:\n  version: '25.4'\n  timeout: 5\n"})
+    _, data, _ = consolidated_helm_chart_data(source_chart, values_order=values_order)
+
+    report_path, counts = compare_helm_chart(data, target_chart, str(tmp_path), exclude_files=["Chart.yaml"])
+
+    assert report_path == os.path.join(str(tmp_path), "target.compare.jsonl")
+    with open(report_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [(r["change"], r["path"], r.get("target_file")) for r in records] == [
+        ("changed", "global.timeout", os.path.join(target_chart, "values.yaml")),
+        ("added", "cs", None),
+    ]
+    assert counts == {"changed": 1, "added": 1}
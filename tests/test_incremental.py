@@ -0,0 +1,33 @@
+import os
+
+from merge.helm_hander.incremental import incremental_merge
+
+__author__ = "Kartik nataraj subramanian"
+__copyright__ = "Kartik nataraj subramanian"
+__license__ = "MIT"
+
+
+def test_incremental_merge_reapplies_only_affected_targets(source_chart, make_chart, values_order, tmp_path):
+    """A rerun re-applies only targets that were edited or own changed keys"""
+    target_chart = make_chart(
+        tmp_path / "target",
+        {"global.yaml": "global:\n  version: '24.4'\n", "cs.yaml": "cs:\n  replicas: 1\n"},
+    )
+    kwargs = dict(
+        values_order=values_order,
+        target_config={"exclude_files": ["Chart.yaml"]},
+        manifest_path=str(tmp_path / "manifest.json"),
+    )
+    global_yaml = os.path.join(target_chart, "global.yaml")
+    cs_yaml = os.path.join(target_chart, "cs.yaml")
+
+    assert incremental_merge(source_chart, target_chart, **kwargs) == {global_yaml: ["global.version"], cs_yaml: ["cs.replicas"]}
+    assert incremental_merge(source_chart, target_chart, **kwargs) == {}
+
+    with open(os.path.join(source_chart, "documentum-components.yaml"), "w", encoding="utf-8") as f:
+        f.write("cs:\n  replicas: 5\n")
+    assert incremental_merge(source_chart, target_chart, **kwargs) == {cs_yaml: ["cs.replicas"]}
+
+    with open(global_yaml, "w", encoding="utf-8") as f:
+        f.write("global:\n  version: '1.0'\n")
+    assert incremental_merge(source_chart, target_chart, **kwargs) == {global_yaml: ["global.version"]}
@@ -0,0 +1,79 @@
+import os
+
+from merge.helm_hander.iterators import ChartFileFilter, iter_yaml_files
+
+__author__ = "Kartik nataraj subramanian"
+__copyright__ = "Kartik nataraj subramanian"
+__license__ = "MIT"
+
+
+def touch(root, *rel_paths):
+    for rel_path in rel_paths:
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "w").close()
+
+
+def rel_files(root, **kwargs):
+    return [os.path.relpath(path, root).replace(os.sep, "/") for path in iter_yaml_files(str(root), **kwargs)]
+
+
+def test_iter_yaml_files_patterns(tmp_path):
+    """Globs, regexes, negation and relative paths are honoured while walking"""
+    touch(
+        tmp_path,
+        "Chart.yaml",
+        "values.yaml",
+        "notes.txt",
+        "res-small.yaml",
+        "res-large.yaml",
+        "config/a.yml",
+        "config/ci/b.yaml",
+        "templates/t.yaml",
+        "platforms/anthos.yaml",
+    )
+
+    assert rel_files(tmp_path) == [
+        "Chart.yaml",
+        "res-large.yaml",
+        "res-small.yaml",
+        "values.yaml",
+        "config/a.yml",
+        "config/ci/b.yaml",
+        "platforms/anthos.yaml",
+        "templates/t.yaml",
+    ]
+    assert rel_files(
+        tmp_path,
+        exclude_dirs=["templates", "config/ci"],
+        exclude_files=["Chart.yaml", "res-*.yaml", "!res-small.yaml", "re:platforms/.*"],
+    ) == ["res-small.yaml", "values.yaml", "config/a.yml"]
+    assert rel_files(tmp_path, include_dirs=["config"], include_files=["*.yml"]) == ["config/a.yml"]
+
+
+def test_helmignore_rules(tmp_path):
+    """.helmignore patterns apply when requested"""
+    touch(tmp_path, "values.yaml", "ci/test-values.yaml", "extra.yaml")
+    (tmp_path / ".helmignore").write_text("# comment\nci/\nextra.yaml\n")
+
+    assert rel_files(tmp_path, helmignore=True) == ["values.yaml"]
+    assert len(rel_files(tmp_path)) == 3
+
+
+def test_path_globs_do_not_cross_directories(tmp_path):
+    """As in .helmignore, * in a path pattern stops at /"""
+    touch(tmp_path, "config/a.yaml", "config/ci/b.yaml", "config/ci/c.yaml")
+
+    assert rel_files(tmp_path, exclude_files=["config/*"]) == ["config/ci/b.yaml", "config/ci/c.yaml"]
+    assert rel_files(tmp_path, exclude_files=["config/*/?.yaml", "!config/ci/[!b].yaml"]) == [
+        "config/a.yaml",
+        "config/ci/c.yaml",
+    ]
+
+
+def test_chart_file_filter_accepts_relative_paths():
+    chart_filter = ChartFileFilter(exclude_dirs=["platforms"], exclude_files=["Chart.yaml"])
+
+    assert chart_filter.accepts("config/configuration.yml")
+    assert not chart_filter.accepts("platforms/anthos.yaml")
+    assert not chart_filter.accepts("Chart.yaml")
@@ -0,0 +1,185 @@
+import os
+
+from merge.helm_hander import processor
+from merge.helm_hander.processor import (
+    build_path_index,
+    dump_yaml,
+    iter_wrapped_nodes,
+    load_key_ownership,
+    load_values_only_with_wrapped_scalars,
+    load_yaml_with_anchor_index,
+    load_yaml_with_wrapped_scalars,
+    plan_yaml_file,
+    update_yaml_from_wrapped_data,
+)
+
+__author__ = "Kartik nataraj subramanian"
+__copyright__ = "Kartik nataraj subramanian"
+__license__ = "MIT"
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_update_writes_changed_target(tmp_path):
+    """Changed values are written back, comments survive"""
+    source = write(tmp_path / "source.yaml", "image:\n  tag: '2.0'\n")
+    target = write(tmp_path / "target.yaml", "image:\n  tag: '1.0'  # pinned\n  pull: Always\n")
+
+    updates = update_yaml_from_wrapped_data(load_yaml_with_wrapped_scalars(source), target, target)
+
+    assert updates == ["image.tag"]
+    assert (tmp_path / "target.yaml").read_text() == "image:\n  tag: '2.0'  # pinned\n  pull: Always\n"
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_update_skips_unchanged_target(tmp_path):
+    """A no-op merge does not rewrite the target file"""
+    source = write(tmp_path / "source.yaml", "image:\n  tag: '1.0'\n")
+    target = write(tmp_path / "target.yaml", "image:\n    tag:   '1.0'\n")
+    os.utime(target, ns=(0, 0))
+
+    updates = update_yaml_from_wrapped_data(load_yaml_with_wrapped_scalars(source), target, target)
+
+    assert updates == []
+    assert os.stat(target).st_mtime_ns == 0
+    assert (tmp_path / "target.yaml").read_text() == "image:\n    tag:   '1.0'\n"
+
+
+def test_wrapped_paths_are_derived_from_parents(tmp_path):
+    """Paths are computed from parent pointers"""
+    source = write(tmp_path / "source.yaml", "a:\n  b:\n    - x\n    - y\n  c: 1\n")
+
+    data = load_yaml_with_wrapped_scalars(source)
+
+    assert data["a"]["c"].path == "a.c"
+    assert data["a"]["b"][1].path == "a.b[1]"
+    assert data["a"]["b"][1].key_path == ("a", "b", 1)
+    assert data["a"]["b"][1].file_path == "source.yaml"
+
+
+def test_single_pass_wrap_keeps_sequence_metadata(tmp_path):
+    """Sequences are wrapped in place and scalars carry their line numbers"""
+    source = write(tmp_path / "source.yaml", "a:\n  b:   # list\n    - x\n    - {k: v}\n  c: 1\n")
+
+    data = load_yaml_with_wrapped_scalars(source)
+
+    assert data["a"]["c"].line_no == 5
+    assert [item.line_no for item in data["a"]["b"]] == [3, 4]
+    assert data["a"]["b"][1].value == {"k": "v"}
+    assert data["a"]["b"].lc.line == 2
+
+
+def test_values_only_loader_keeps_values_without_metadata(tmp_path):
+    """The safe loader yields the same values and paths, without line or anchor metadata"""
+    source = write(tmp_path / "source.yaml", "a:\n  b: &x 'v'\n  c: [1, 2]\n")
+
+    data = load_values_only_with_wrapped_scalars(source)
+    node = data["a"]["b"]
+
+    assert (node.value, node.path, node.line_no, node.anchor_name) == ("v", "a.b", None, None)
+    assert [item.value for item in data["a"]["c"]] == [1, 2]
+    assert [node.value for node in iter_wrapped_nodes(data)] == [
+        node.value for node in iter_wrapped_nodes(load_yaml_with_wrapped_scalars(source))
+    ]
+
+
+def test_path_index_join_matches_target_paths(tmp_path):
+    """Only source leaves whose parent exists in the target are applied"""
+    source = write(tmp_path / "source.yaml", "a:\n  b: 2\n  new: x\nl: [1, 2, 3]\nmissing:\n  c: 1\n")
+    target = write(tmp_path / "target.yaml", "a:\n  b: 1\nl: [1]\n")
+
+    index = build_path_index(load_yaml_with_wrapped_scalars(source))
+    assert list(index) == [("a", "b"), ("a", "new"), ("l", 0), ("l", 1), ("l", 2), ("missing", "c")]
+
+    updates = update_yaml_from_wrapped_data(None, target, target, path_index=index)
+    assert updates == ["a.b", "l[1]", "l[2]"]
+    assert (tmp_path / "target.yaml").read_text() == "a:\n  b: 2\nl: [1, 2, 3]\n"
+
+
+def test_anchor_index_and_anchored_update(tmp_path):
+    """Anchors are indexed at load time and updates keep aliases pointing at them"""
+    source = write(tmp_path / "source.yaml", "image:\n  repo: new\n")
+    target = write(tmp_path / "target.yaml", "image:\n  repo: &repo old\nsidecar:\n  repo: *repo\nlist:\n- *repo\n")
+
+    _, anchors = load_yaml_with_anchor_index(target)
+    assert anchors.definitions == {"repo": ("image", "repo")}
+    assert anchors.aliases == {"repo": [("sidecar", "repo"), ("list", 0)]}
+
+    updates = update_yaml_from_wrapped_data(load_yaml_with_wrapped_scalars(source), target, target)
+
+    assert updates == ["image.repo"]
+    assert (tmp_path / "target.yaml").read_text() == (
+        "image:\n  repo: &repo new\nsidecar:\n  repo: *repo\nlist:\n- *repo\n"
+    )
+
+
+def test_key_ownership_matches_defined_paths_and_appends(tmp_path):
+    """Only paths the target defines, plus sequence appends, are matched"""
+    source = write(tmp_path / "source.yaml", "a:\n  b: 2\n  new: x\nl: [1, 2, 3]\nmissing:\n  c: 1\n")
+    target = write(tmp_path / "target.yaml", "l: [1]\na:\n  b: 1\n  c: {d: 1}\n")
+
+    ownership = load_key_ownership(target)
+    assert ownership.paths == [("l",), ("l", 0), ("a",), ("a", "b"), ("a", "c"), ("a", "c", "d")]
+    assert ownership.matching(build_path_index(load_yaml_with_wrapped_scalars(source))) == [
+        ("l", 0),
+        ("a", "b"),
+        ("l", 1),
+        ("l", 2),
+    ]
+
+
+def test_anchored_update_keeps_alias_sites_with_their_own_source_value(tmp_path):
+    """An alias site the source gives another value stops aliasing instead of being overwritten"""
+    source = write(tmp_path / "source.yaml", "a: 2\nb: 3\nc: 5\n")
+    target = write(tmp_path / "target.yaml", "a: &x 1\nb: *x\nc: 1\n")
+    index = build_path_index(load_yaml_with_wrapped_scalars(source))
+
+    assert [update.to_record(target)["also_affects"] for update in plan_yaml_file(target, index)] == [[], [], []]
+    assert update_yaml_from_wrapped_data(None, target, target, path_index=index) == ["a", "b", "c"]
+    assert (tmp_path / "target.yaml").read_text() == "a: &x 2\nb: 3\nc: 5\n"
+
+    write(tmp_path / "target.yaml", "a: &x 1\nb: *x\nd: *x\n")
+    index = build_path_index(load_yaml_with_wrapped_scalars(write(tmp_path / "source.yaml", "a: 2\nb: 1\n")))
+    assert [update.to_record(target)["also_affects"] for update in plan_yaml_file(target, index)] == [["d"]]
+    assert update_yaml_from_wrapped_data(None, target, target, path_index=index) == ["a"]
+    assert (tmp_path / "target.yaml").read_text() == "a: &x 2\nb: 1\nd: *x\n"
+
+
+def test_source_anchor_names_do_not_select_target_anchors(tmp_path):
+    """A source anchor that shares a name with a target anchor only updates its own key"""
+    source = write(tmp_path / "source.yaml", "x: &c 5\n")
+    target = write(tmp_path / "target.yaml", "x: 1\ny: &c 2\nz: *c\n")
+    index = build_path_index(load_yaml_with_wrapped_scalars(source))
+
+    assert [(update.anchor, update.to_record(target)["also_affects"]) for update in plan_yaml_file(target, index)] == [
+        (None, [])
+    ]
+    assert update_yaml_from_wrapped_data(None, target, target, path_index=index) == ["x"]
+    assert (tmp_path / "target.yaml").read_text() == "x: 5\ny: &c 2\nz: *c\n"
+
+
+def test_dump_yaml_gives_new_files_the_umask_mode(tmp_path, monkeypatch):
+    """Atomic dumps create new files as 0o666 less the umask, and keep an existing file's mode"""
+    monkeypatch.setattr(processor, "_UMASK", 0o022)
+    output = tmp_path / "new.yaml"
+    dump_yaml({"a": 1}, str(output))
+    assert output.stat().st_mode & 0o777 == 0o644
+
+    os.chmod(output, 0o600)
+    dump_yaml({"a": 2}, str(output))
+    assert output.stat().st_mode & 0o777 == 0o600
+
+
+def test_dump_yaml_writes_through_symlinks(tmp_path):
+    """A symlinked values file stays a link and the file it points at is updated"""
+    real = write(tmp_path / "real.yaml", "a: 1\n")
+    link = tmp_path / "values.yaml"
+    link.symlink_to(real)
+
+    dump_yaml({"a": 2}, str(link))
+
+    assert link.is_symlink()
+    assert (tmp_path / "real.yaml").read_text() == "a: 2\n"
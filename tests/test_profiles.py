@@ -0,0 +1,59 @@
+from merge.__main__ import (
+    HELM_READ_CONFIG_SOURCE,
+    HELM_READ_CONFIG_TARGET,
+    VALUES_ORDER_DEFAULT,
+    select_profile,
+    unique_paths,
+)
+from merge.helm_hander.iterators import ChartFileFilter
+
+__author__ = "Kartik nataraj subramanian"
+__copyright__ = "Kartik nataraj subramanian"
+__license__ = "MIT"
+
+
+def accepts(config, rel_path):
+    return ChartFileFilter(
+        config["exclude_dirs"], config["exclude_files"], config["include_files"], config["include_dirs"]
+    ).accepts(rel_path)
+
+
+def test_select_profile_defaults_are_unchanged():
+    """Without --resource-file and --platform the built-in defaults are used as is"""
+    assert select_profile(VALUES_ORDER_DEFAULT) == (VALUES_ORDER_DEFAULT, HELM_READ_CONFIG_SOURCE, HELM_READ_CONFIG_TARGET)
+
+
+def test_select_profile_applies_helmignore_only_when_asked():
+    """.helmignore rules are opt-in with --helmignore"""
+    assert not HELM_READ_CONFIG_SOURCE["helmignore"] and not HELM_READ_CONFIG_TARGET["helmignore"]
+    _, source_config, target_config = select_profile(VALUES_ORDER_DEFAULT, helmignore=True)
+    assert source_config["helmignore"] and target_config["helmignore"]
+
+
+def test_select_profile_swaps_resource_and_platform_files():
+    """The chosen profiles replace the defaults in the order; other profiles are excluded"""
+    values_order, source_config, target_config = select_profile(VALUES_ORDER_DEFAULT, ["small"], ["gke"])
+
+    assert values_order == [
+        "./config/configuration.yml",
+        "./config/constants.yaml",
+        "./config/passwords.yaml",
+        "./platforms/gke.yaml",
+        "./documentum-resources-values-small.yaml",
+        "./documentum-components.yaml",
+    ]
+    for config in (source_config, target_config):
+        assert accepts(config, "documentum-resources-values-small.yaml")
+        assert not accepts(config, "documentum-resources-values-dev-test.yaml")
+        assert not accepts(config, "documentum-resources-values-large.yaml")
+        assert not accepts(config, "passwords_vault.yaml")
+    assert accepts(source_config, "platforms/gke.yaml")
+    assert not accepts(source_config, "platforms/anthos.yaml")
+
+
+def test_unique_paths_keeps_the_first_of_each_normalized_path(tmp_path, monkeypatch):
+    """Batch targets listed twice, in any spelling, are merged once"""
+    monkeypatch.chdir(tmp_path)
+    paths = ["a", str(tmp_path / "b"), "./a", "b/", str(tmp_path / "a"), "c"]
+
+    assert unique_paths(paths) == ["a", str(tmp_path / "b"), "c"]
@@ -0,0 +1,48 @@
+import pytest
+
+from merge.helm_hander.remap import KeyRemapper
+
+__author__ = "Kartik nataraj subramanian"
+__copyright__ = "Kartik nataraj subramanian"
+__license__ = "MIT"
+
+
+def test_remapper_moves_wildcard_and_prefix_rules_without_mutating_input():
+    """Wildcard, prefix and drop rules apply in one pass; the most specific rule wins"""
+    data = {
+        "global": {"images": {"cs": "v1", "da": "v2"}, "version": 1},
+        "images": {"ot": "v3"},
+        "a": {"b": 1, "c": 2},
+        "old": 0,
+    }
+    remapper = KeyRemapper([("global.images.*", "images.*"), ("a", "z"), ("a.b", "x.y"), ("old", "")])
+
+    assert remapper.remap(data) == {
+        "global": {"version": 1},
+        "images": {"ot": "v3", "cs": "v1", "da": "v2"},
+        "z": {"c": 2},
+        "x": {"y": 1},
+    }
+    assert data["images"] == {"ot": "v3"}
+    assert data["global"]["images"] == {"cs": "v1", "da": "v2"}
+
+
+def test_remapper_rejects_unbalanced_wildcards():
+    """Target wildcards must match the source wildcards"""
+    with pytest.raises(ValueError):
+        KeyRemapper([("a.*", "b")])
+
+
+def test_remapper_applies_wildcard_next_to_an_exact_sibling():
+    """An exact mapping only shadows a wildcard sibling for the keys it covers"""
+    data = {"images": {"cs": {"repo": "r1", "tag": "t1"}, "da": {"repo": "r2", "tag": "t2"}}}
+    remapper = KeyRemapper([("images.*.repo", "repos.*"), ("images.cs.tag", "tags.cs")])
+
+    assert remapper.remap(data) == {
+        "images": {"da": {"tag": "t2"}},
+        "repos": {"cs": "r1", "da": "r2"},
+        "tags": {"cs": "t1"},
+    }
+
+    remapper = KeyRemapper([("images.*", "all.*"), ("images.cs.repo", "cs_repo"), ("images.da", "")])
+    assert remapper.remap(data) == {"all": {"cs": {"tag": "t1"}}, "cs_repo": "r1"}
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+__author__ = "Kartik nataraj subramanian"
+__copyright__ = "Kartik nataraj subramanian"
+__license__ = "MIT"
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+# Generous on purpose: the point is to catch ruamel.yaml creeping back into startup.
+STARTUP_BUDGET_SECONDS = 2.0
+
+PROBE = """
+import runpy, sys
+sys.argv = ["merge"] + sys.argv[1:]
+try:
+    runpy.run_module("merge", run_name="__main__")
+except SystemExit:
+    pass
+heavy = ("ruamel", "importlib.metadata", "merge.helm_hander")
+print(sorted(name for name in sys.modules if name.startswith(heavy)))
+"""
+
+
+def run_probe(*args):
+    env = dict(os.environ, PYTHONPATH=SRC + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.run(
+        [sys.executable, "-c", PROBE, *args], capture_output=True, text=True, env=env, check=True
+    ).stdout.splitlines()[-1]
+
+
+@pytest.mark.parametrize("args", [["--help"], ["--version"], ["folder", "missing-source", "missing-target"]])
+def test_cli_startup_does_not_import_yaml_stack(args):
+    """--help, --version and argument errors do not import ruamel.yaml or the chart pipeline"""
+    assert run_probe(*args) == "[]"
+
+
+def test_cli_help_startup_budget():
+    """python -m merge --help stays within the startup budget"""
+    env = dict(os.environ, PYTHONPATH=SRC + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "merge", "--help"], capture_output=True, env=env, check=True)
+    assert time.perf_counter() - start < STARTUP_BUDGET_SECONDS
@@ -0,0 +1,111 @@
+import os
+
+import pytest
+
+from merge.common.utils import deep_merge, format_key_path, link_chart_folder, merge_trees
+from merge.helm_hander.processor import dump_yaml
+
+__author__ = "Kartik nataraj subramanian"
+__copyright__ = "Kartik nataraj subramanian"
+__license__ = "MIT"
+
+
+def test_deep_merge_handles_deep_trees():
+    """No recursion limit on nesting depth"""
+    dest, src = {}, {}
+    node_d, node_s = dest, src
+    for _ in range(5000):
+        node_d["n"], node_s["n"] = {"keep": 1}, {}
+        node_d, node_s = node_d["n"], node_s["n"]
+    node_s["leaf"] = True
+
+    merged = deep_merge(dest, src)
+
+    assert merged is dest
+    for _ in range(5000):
+        merged = merged["n"]
+    assert merged == {"keep": 1, "leaf": True}
+
+
+def test_merge_trees_shares_untouched_subtrees():
+    """Inputs are not mutated and untouched subtrees are shared"""
+    base = {"a": {"x": 1}, "b": {"y": 1}}
+    overlay = {"b": {"y": 2}, "c": {"z": 3}}
+
+    merged = merge_trees(base, overlay)
+
+    assert merged == {"a": {"x": 1}, "b": {"y": 2}, "c": {"z": 3}}
+    assert base == {"a": {"x": 1}, "b": {"y": 1}}
+    assert merged["a"] is base["a"]
+    assert merged["c"] is overlay["c"]
+
+
+def test_merge_trees_list_policies():
+    """Lists are replaced by default, appended or merged by key per path"""
+    base = {
+        "args": ["-a"],
+        "env": ["X=1"],
+        "containers": [{"name": "app", "image": "v1", "port": 80}, {"name": "side", "image": "s1"}],
+    }
+    overlay = {
+        "args": ["-b"],
+        "env": ["Y=2"],
+        "containers": [{"name": "app", "image": "v2"}, {"name": "new", "image": "n1"}],
+    }
+    policies = {"env": "append", "contain*": "merge-by-key:name"}
+
+    merged = merge_trees(base, overlay, list_policies=policies)
+
+    assert merged["args"] == ["-b"]
+    assert merged["env"] == ["X=1", "Y=2"]
+    assert merged["containers"] == [
+        {"name": "app", "image": "v2", "port": 80},
+        {"name": "side", "image": "s1"},
+        {"name": "new", "image": "n1"},
+    ]
+    assert base["containers"][0]["image"] == "v1"
+    with pytest.raises(ValueError):
+        merge_trees(base, overlay, list_policies={"env": "zip"})
+
+
+def test_merge_by_key_merges_duplicate_overlay_items_in_order():
+    """Overlay items sharing a key are merged one after another, not dropped"""
+    base = {"containers": [{"name": "app", "image": "v1", "port": 80}]}
+    overlay = {
+        "containers": [
+            {"name": "app", "image": "v2", "env": {"A": "1"}},
+            {"name": "new", "image": "n1"},
+            {"name": "app", "env": {"B": "2"}},
+            {"name": "new", "port": 90},
+            {"name": "app", "image": "v3"},
+        ]
+    }
+
+    merged = merge_trees(base, overlay, list_policies={"containers": "merge-by-key:name"})
+
+    assert merged["containers"] == [
+        {"name": "app", "image": "v3", "port": 80, "env": {"A": "1", "B": "2"}},
+        {"name": "new", "image": "n1", "port": 90},
+    ]
+    assert overlay["containers"][1] == {"name": "new", "image": "n1"}
+    assert base["containers"][0] == {"name": "app", "image": "v1", "port": 80}
+
+
+def test_format_key_path():
+    assert format_key_path(("a", "b", 2, "c")) == "a.b[2].c"
+    assert format_key_path(()) == ""
+
+
+def test_link_chart_folder_shares_files_until_rewritten(tmp_path):
+    """Output files are hard links; an atomic dump breaks the link and leaves the original alone"""
+    chart = tmp_path / "chart"
+    (chart / "charts").mkdir(parents=True)
+    (chart / "charts" / "sub.tgz").write_bytes(b"\0" * 16)
+    (chart / "values.yaml").write_text("a: 1\n")
+
+    output = link_chart_folder(str(chart))
+
+    assert output == str(tmp_path / "chart_copy1")
+    assert os.path.samefile(chart / "charts" / "sub.tgz", os.path.join(output, "charts", "sub.tgz"))
+    dump_yaml({"a": 2}, os.path.join(output, "values.yaml"))
+    assert (chart / "values.yaml").read_text() == "a: 1\n"
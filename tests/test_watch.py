@@ -0,0 +1,57 @@
+import os
+
+from merge.helm_hander.watch import ChartWatcher
+
+__author__ = "Kartik nataraj subramanian"
+__copyright__ = "Kartik nataraj subramanian"
+__license__ = "MIT"
+
+
+def test_watcher_reparses_changed_file_and_updates_affected_targets(
+    source_chart, make_chart, values_order, tmp_path, monkeypatch
+):
+    """Only the changed values file is parsed again and only its targets are written"""
+    target_chart = make_chart(
+        tmp_path / "target",
+        {"global.yaml": "global:\n  timeout: 1\n", "cs.yaml": "cs:\n  replicas: 1\n"},
+    )
+    watcher = ChartWatcher(source_chart, target_chart, values_order, target_config={"exclude_files": ["Chart.yaml"]})
+    cs_yaml = os.path.join(target_chart, "cs.yaml")
+
+    assert sorted(watcher.start()) == [cs_yaml, os.path.join(target_chart, "global.yaml")]
+    assert watcher.poll() == {}
+
+    loaded = []
+    load = watcher._load
+    monkeypatch.setattr(watcher, "_load", lambda yaml_files: loaded.extend(yaml_files) or load(yaml_files))
+    components = os.path.join(source_chart, "documentum-components.yaml")
+    with open(components, "w", encoding="utf-8") as f:
+        f.write("cs:\n  replicas: 7\n  extra: true\n")
+
+    assert watcher.poll() == {cs_yaml: ["cs.replicas"]}
+    assert loaded == [components]
+    with open(cs_yaml, encoding="utf-8") as f:
+        assert f.read() == "cs:\n  replicas: 7\n"
+
+
+def test_watcher_keeps_the_last_good_values_of_a_file_that_fails_to_parse(
+    source_chart, make_chart, values_order, tmp_path
+):
+    """A half-saved values file neither reverts the target nor stops being watched"""
+    target_chart = make_chart(tmp_path / "target", {"cs.yaml": "cs:\n  replicas: 1\n"})
+    watcher = ChartWatcher(source_chart, target_chart, values_order, target_config={"exclude_files": ["Chart.yaml"]})
+    cs_yaml = os.path.join(target_chart, "cs.yaml")
+    components = os.path.join(source_chart, "documentum-components.yaml")
+
+    assert watcher.start() == {cs_yaml: ["cs.replicas"]}
+    with open(components, "w", encoding="utf-8") as f:
+        f.write("cs:\n  replicas: [3")
+
+    assert watcher.poll() == {}
+    assert watcher.poll() == {}
+    with open(cs_yaml, encoding="utf-8") as f:
+        assert f.read() == "cs:\n  replicas: 3\n"
+
+    with open(components, "w", encoding="utf-8") as f:
+        f.write("cs:\n  replicas: 5\n")
+    assert watcher.poll() == {cs_yaml: ["cs.replicas"]}